@@ -27,11 +27,15 @@ def upgrade() -> None:
     # Alter column to new dimensions
     op.execute('ALTER TABLE knowledge_embeddings ALTER COLUMN embedding TYPE vector(1024)')
     
-    # Recreate HNSW index for 1024 dimensions
+    # Recreate HNSW index for 1024 dimensions (tuned m/ef_construction,
+    # built with extra maintenance memory and parallel workers)
+    op.execute("SET maintenance_work_mem = '2GB'")
+    op.execute('SET max_parallel_maintenance_workers = 7')
     op.execute('''
-        CREATE INDEX ix_knowledge_embeddings_vector 
-        ON knowledge_embeddings 
+        CREATE INDEX ix_knowledge_embeddings_vector
+        ON knowledge_embeddings
         USING hnsw (embedding vector_cosine_ops)
+        WITH (m = 24, ef_construction = 128)
     ''')
 
 
@@ -0,0 +1,52 @@
+"""Switch embedding column to halfvec(1024)
+
+Revision ID: h8c1d5e6f7a4
+Revises: da1bd209b521
+Create Date: 2025-12-05 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'h8c1d5e6f7a4'
+down_revision = 'da1bd209b521'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # fp16 storage halves the index footprint and bytes moved per HNSW scan
+    # with negligible recall loss; write paths still send fp32 lists and
+    # Postgres casts server-side.
+    op.execute('DROP INDEX IF EXISTS ix_knowledge_embeddings_vector')
+    op.execute('''
+        ALTER TABLE knowledge_embeddings
+        ALTER COLUMN embedding TYPE halfvec(1024)
+        USING embedding::halfvec(1024)
+    ''')
+
+    op.execute("SET maintenance_work_mem = '2GB'")
+    op.execute('SET max_parallel_maintenance_workers = 7')
+    op.execute('''
+        CREATE INDEX ix_knowledge_embeddings_vector
+        ON knowledge_embeddings
+        USING hnsw (embedding halfvec_cosine_ops)
+        WITH (m = 24, ef_construction = 128)
+    ''')
+
+
+def downgrade() -> None:
+    op.execute('DROP INDEX IF EXISTS ix_knowledge_embeddings_vector')
+    op.execute('''
+        ALTER TABLE knowledge_embeddings
+        ALTER COLUMN embedding TYPE vector(1024)
+        USING embedding::vector(1024)
+    ''')
+    op.execute('''
+        CREATE INDEX ix_knowledge_embeddings_vector
+        ON knowledge_embeddings
+        USING hnsw (embedding vector_cosine_ops)
+        WITH (m = 24, ef_construction = 128)
+    ''')
@@ -0,0 +1,56 @@
+"""Add domain to knowledge_embeddings with partial HNSW indexes
+
+Revision ID: i9d2e6f7a8b5
+Revises: h8c1d5e6f7a4
+Create Date: 2025-12-05 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'i9d2e6f7a8b5'
+down_revision = 'h8c1d5e6f7a4'
+branch_labels = None
+depends_on = None
+
+# Keep in sync with VALID_DOMAINS in app/schemas/knowledge_base.py
+DOMAINS = ["backend", "frontend", "database", "devops", "api", "mobile", "infrastructure", "ai", "general"]
+
+
+def upgrade() -> None:
+    # Denormalize domain so domain-filtered vector searches don't have to
+    # join back to knowledge_bases, and so partial HNSW indexes can use an
+    # immutable predicate.
+    op.add_column(
+        'knowledge_embeddings',
+        sa.Column('domain', sa.String(), nullable=False, server_default='general')
+    )
+    op.execute('''
+        UPDATE knowledge_embeddings ke
+        SET domain = kb.domain
+        FROM knowledge_bases kb
+        WHERE ke.kb_id = kb.id
+    ''')
+    op.create_index(op.f('ix_knowledge_embeddings_domain'), 'knowledge_embeddings', ['domain'], unique=False)
+
+    # One partial HNSW index per domain keeps filtered ANN scans on a small,
+    # fully matching index instead of over-scanning the global graph.
+    op.execute("SET maintenance_work_mem = '2GB'")
+    op.execute('SET max_parallel_maintenance_workers = 7')
+    for domain in DOMAINS:
+        op.execute(f'''
+            CREATE INDEX ix_kemb_hnsw_{domain}
+            ON knowledge_embeddings
+            USING hnsw (embedding halfvec_cosine_ops)
+            WITH (m = 24, ef_construction = 128)
+            WHERE domain = '{domain}'
+        ''')
+
+
+def downgrade() -> None:
+    for domain in DOMAINS:
+        op.execute(f'DROP INDEX IF EXISTS ix_kemb_hnsw_{domain}')
+    op.drop_index(op.f('ix_knowledge_embeddings_domain'), table_name='knowledge_embeddings')
+    op.drop_column('knowledge_embeddings', 'domain')
@@ -0,0 +1,41 @@
+"""Add filter and FK indexes to feature_requests
+
+Revision ID: j1e3f7a8b9c6
+Revises: i9d2e6f7a8b5
+Create Date: 2025-12-05 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'j1e3f7a8b9c6'
+down_revision = 'i9d2e6f7a8b5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Dashboard list queries filter on status/priority; the initial tables
+    # migration only indexed id and title, so these were seq scans.
+    op.create_index(
+        'ix_feature_requests_status_priority',
+        'feature_requests', ['status', 'priority'], unique=False
+    )
+    # The FKs to users were created without backing indexes, which hurts
+    # joins and makes user deletes seq-scan this table for RI checks.
+    op.create_index(
+        op.f('ix_feature_requests_requester_id'),
+        'feature_requests', ['requester_id'], unique=False
+    )
+    op.create_index(
+        op.f('ix_feature_requests_assigned_to_id'),
+        'feature_requests', ['assigned_to_id'], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_feature_requests_assigned_to_id'), table_name='feature_requests')
+    op.drop_index(op.f('ix_feature_requests_requester_id'), table_name='feature_requests')
+    op.drop_index('ix_feature_requests_status_priority', table_name='feature_requests')
@@ -0,0 +1,46 @@
+"""Convert feature_requests.tags from JSON to text[] with GIN index
+
+Revision ID: k2f4a8b9c1d7
+Revises: j1e3f7a8b9c6
+Create Date: 2025-12-05 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'k2f4a8b9c1d7'
+down_revision = 'j1e3f7a8b9c6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Native arrays let tag filters use a GIN inverted index
+    # (WHERE tags && ARRAY['reporting']) instead of scanning JSON per row.
+    op.execute('''
+        ALTER TABLE feature_requests
+        ALTER COLUMN tags TYPE text[]
+        USING CASE
+            WHEN tags IS NULL THEN NULL
+            ELSE ARRAY(SELECT jsonb_array_elements_text(tags::jsonb))
+        END
+    ''')
+    op.execute('''
+        CREATE INDEX ix_feature_requests_tags_gin
+        ON feature_requests
+        USING gin (tags)
+    ''')
+
+
+def downgrade() -> None:
+    op.execute('DROP INDEX IF EXISTS ix_feature_requests_tags_gin')
+    op.execute('''
+        ALTER TABLE feature_requests
+        ALTER COLUMN tags TYPE json
+        USING CASE
+            WHEN tags IS NULL THEN NULL
+            ELSE to_json(tags)
+        END
+    ''')
@@ -0,0 +1,57 @@
+"""Convert status and priority to native PG enums
+
+Revision ID: l3a5b9c1d2e8
+Revises: k2f4a8b9c1d7
+Create Date: 2025-12-05 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'l3a5b9c1d2e8'
+down_revision = 'k2f4a8b9c1d7'
+branch_labels = None
+depends_on = None
+
+FEATURE_STATUSES = (
+    'draft', 'submitted', 'under_review', 'approved', 'rejected',
+    'in_development', 'in_qa', 'completed', 'deployed'
+)
+PRIORITIES = ('low', 'medium', 'high', 'critical')
+
+
+def upgrade() -> None:
+    # Native enums are 4 bytes vs 5-10+ bytes for the varchar values, so
+    # rows (and the status/priority indexes) get narrower and comparisons
+    # cheaper. Values match the Python FeatureStatus/Priority enums.
+    status_values = ", ".join(f"'{v}'" for v in FEATURE_STATUSES)
+    priority_values = ", ".join(f"'{v}'" for v in PRIORITIES)
+    op.execute(f"CREATE TYPE feature_status AS ENUM ({status_values})")
+    op.execute(f"CREATE TYPE priority AS ENUM ({priority_values})")
+    op.execute('''
+        ALTER TABLE feature_requests
+        ALTER COLUMN status TYPE feature_status
+        USING status::feature_status
+    ''')
+    op.execute('''
+        ALTER TABLE feature_requests
+        ALTER COLUMN priority TYPE priority
+        USING priority::priority
+    ''')
+
+
+def downgrade() -> None:
+    op.execute('''
+        ALTER TABLE feature_requests
+        ALTER COLUMN status TYPE varchar
+        USING status::text
+    ''')
+    op.execute('''
+        ALTER TABLE feature_requests
+        ALTER COLUMN priority TYPE varchar
+        USING priority::text
+    ''')
+    op.execute('DROP TYPE feature_status')
+    op.execute('DROP TYPE priority')
@@ -0,0 +1,32 @@
+"""Covering index for post-ANN embedding metadata lookups
+
+Revision ID: m4b6c1d2e3f9
+Revises: l3a5b9c1d2e8
+Create Date: 2025-12-05 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'm4b6c1d2e3f9'
+down_revision = 'l3a5b9c1d2e8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # pgvector's HNSW index can't INCLUDE payload columns, so every top-k
+    # result costs a random heap fetch just to read kb_id/section metadata.
+    # This small covering B-tree serves those lookups (join back by id after
+    # the ANN scan) from a single index page via an index-only scan.
+    op.execute('''
+        CREATE INDEX ix_knowledge_embeddings_cover
+        ON knowledge_embeddings (id)
+        INCLUDE (kb_id, section_address, section_title)
+    ''')
+
+
+def downgrade() -> None:
+    op.execute('DROP INDEX IF EXISTS ix_knowledge_embeddings_cover')
@@ -0,0 +1,36 @@
+"""Index remaining FK columns referencing users and feature_requests
+
+Revision ID: n5c7d2e3f4a1
+Revises: m4b6c1d2e3f9
+Create Date: 2025-12-05 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'n5c7d2e3f4a1'
+down_revision = 'm4b6c1d2e3f9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # A DELETE on users seq-scans every referencing table without these;
+    # feature_requests FKs were already indexed in j1e3f7a8b9c6.
+    op.create_index(op.f('ix_knowledge_bases_created_by_id'), 'knowledge_bases', ['created_by_id'], unique=False)
+    op.create_index(op.f('ix_knowledge_bases_updated_by_id'), 'knowledge_bases', ['updated_by_id'], unique=False)
+    op.create_index(op.f('ix_comments_feature_id'), 'comments', ['feature_id'], unique=False)
+    op.create_index(op.f('ix_comments_user_id'), 'comments', ['user_id'], unique=False)
+    op.create_index(op.f('ix_attachments_feature_id'), 'attachments', ['feature_id'], unique=False)
+    op.create_index(op.f('ix_attachments_user_id'), 'attachments', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_attachments_user_id'), table_name='attachments')
+    op.drop_index(op.f('ix_attachments_feature_id'), table_name='attachments')
+    op.drop_index(op.f('ix_comments_user_id'), table_name='comments')
+    op.drop_index(op.f('ix_comments_feature_id'), table_name='comments')
+    op.drop_index(op.f('ix_knowledge_bases_updated_by_id'), table_name='knowledge_bases')
+    op.drop_index(op.f('ix_knowledge_bases_created_by_id'), table_name='knowledge_bases')
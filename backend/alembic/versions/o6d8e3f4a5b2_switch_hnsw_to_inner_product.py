@@ -0,0 +1,56 @@
+"""Switch HNSW indexes from cosine to inner-product opclass
+
+Revision ID: o6d8e3f4a5b2
+Revises: n5c7d2e3f4a1
+Create Date: 2025-12-05 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'o6d8e3f4a5b2'
+down_revision = 'n5c7d2e3f4a1'
+branch_labels = None
+depends_on = None
+
+# Keep in sync with VALID_DOMAINS in app/schemas/knowledge_base.py
+DOMAINS = ["backend", "frontend", "database", "devops", "api", "mobile", "infrastructure", "ai", "general"]
+
+
+def _rebuild_indexes(opclass: str) -> None:
+    op.execute("SET maintenance_work_mem = '2GB'")
+    op.execute('SET max_parallel_maintenance_workers = 7')
+    op.execute('DROP INDEX IF EXISTS ix_knowledge_embeddings_vector')
+    op.execute(f'''
+        CREATE INDEX ix_knowledge_embeddings_vector
+        ON knowledge_embeddings
+        USING hnsw (embedding {opclass})
+        WITH (m = 24, ef_construction = 128)
+    ''')
+    for domain in DOMAINS:
+        op.execute(f'DROP INDEX IF EXISTS ix_kemb_hnsw_{domain}')
+        op.execute(f'''
+            CREATE INDEX ix_kemb_hnsw_{domain}
+            ON knowledge_embeddings
+            USING hnsw (embedding {opclass})
+            WITH (m = 24, ef_construction = 128)
+            WHERE domain = '{domain}'
+        ''')
+
+
+def upgrade() -> None:
+    # The app now L2-normalizes embeddings at generation time, so inner
+    # product gives cosine-identical ordering without the per-comparison
+    # norm math inside the HNSW graph walk. Queries use <#> accordingly.
+    # Rows embedded before that change are not guaranteed unit-norm
+    # (gemini-embedding-001 only normalizes its 3072-d output, not the
+    # 1024-d truncation we store), so renormalize in place first -
+    # otherwise <#> biases toward long vectors and scores leave [0, 1].
+    op.execute('UPDATE knowledge_embeddings SET embedding = l2_normalize(embedding)')
+    _rebuild_indexes('halfvec_ip_ops')
+
+
+def downgrade() -> None:
+    _rebuild_indexes('halfvec_cosine_ops')
@@ -0,0 +1,36 @@
+"""Add binary-quantized HNSW expression index for prefiltering
+
+Revision ID: p7e9f4a5b6c3
+Revises: o6d8e3f4a5b2
+Create Date: 2025-12-05 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'p7e9f4a5b6c3'
+down_revision = 'o6d8e3f4a5b2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Expression index on the binary quantization of the embedding: 1 bit per
+    # dimension instead of 16, so the ANN graph walk touches ~16x fewer bytes
+    # and distance is a POPCNT. Search overcaptures candidates by hamming
+    # distance here, then re-ranks the small pool against the fp16 column.
+    # No stored column is needed; the expression keeps inserts unchanged.
+    op.execute("SET maintenance_work_mem = '2GB'")
+    op.execute('SET max_parallel_maintenance_workers = 7')
+    op.execute('''
+        CREATE INDEX ix_kemb_bit_hnsw
+        ON knowledge_embeddings
+        USING hnsw ((binary_quantize(embedding)::bit(1024)) bit_hamming_ops)
+        WITH (m = 24, ef_construction = 128)
+    ''')
+
+
+def downgrade() -> None:
+    op.execute('DROP INDEX IF EXISTS ix_kemb_bit_hnsw')
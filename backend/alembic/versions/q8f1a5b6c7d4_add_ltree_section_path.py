@@ -0,0 +1,39 @@
+"""Add ltree section_path for hierarchical section queries
+
+Revision ID: q8f1a5b6c7d4
+Revises: p7e9f4a5b6c3
+Create Date: 2025-12-05 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'q8f1a5b6c7d4'
+down_revision = 'p7e9f4a5b6c3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # ltree gives O(log n) ancestor/prefix queries ("all subsections of 1.2")
+    # via a GiST index, instead of LIKE 'x.%' collation hacks on the string
+    # column. section_address stays for display until all callers migrate.
+    op.execute('CREATE EXTENSION IF NOT EXISTS ltree')
+    op.execute('ALTER TABLE knowledge_embeddings ADD COLUMN section_path ltree')
+    # Labels may only contain [A-Za-z0-9_]; sanitize anything else before cast
+    op.execute('''
+        UPDATE knowledge_embeddings
+        SET section_path = text2ltree(regexp_replace(section_address, '[^A-Za-z0-9_.]', '_', 'g'))
+    ''')
+    op.execute('''
+        CREATE INDEX ix_kemb_section_path_gist
+        ON knowledge_embeddings
+        USING gist (section_path)
+    ''')
+
+
+def downgrade() -> None:
+    op.execute('DROP INDEX IF EXISTS ix_kemb_section_path_gist')
+    op.execute('ALTER TABLE knowledge_embeddings DROP COLUMN IF EXISTS section_path')
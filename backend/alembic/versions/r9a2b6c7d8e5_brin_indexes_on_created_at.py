@@ -0,0 +1,35 @@
+"""BRIN indexes on created_at for time-range dashboards
+
+Revision ID: r9a2b6c7d8e5
+Revises: q8f1a5b6c7d4
+Create Date: 2025-12-05 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'r9a2b6c7d8e5'
+down_revision = 'q8f1a5b6c7d4'
+branch_labels = None
+depends_on = None
+
+# Append-mostly tables whose created_at correlates with physical row order,
+# which is exactly where BRIN beats a B-tree (~1000x smaller, near-zero
+# write cost, bitmap scans for "last 7 days" dashboard filters)
+TABLES = ["feature_requests", "comments", "attachments", "knowledge_embeddings"]
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        op.execute(f'''
+            CREATE INDEX ix_{table}_created_brin
+            ON {table}
+            USING brin (created_at) WITH (pages_per_range = 32)
+        ''')
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        op.execute(f'DROP INDEX IF EXISTS ix_{table}_created_brin')
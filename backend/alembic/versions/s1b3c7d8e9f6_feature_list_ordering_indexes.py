@@ -0,0 +1,48 @@
+"""Composite ordering indexes and trigram search index for feature lists
+
+Revision ID: s1b3c7d8e9f6
+Revises: r9a2b6c7d8e5
+Create Date: 2025-12-05 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 's1b3c7d8e9f6'
+down_revision = 'r9a2b6c7d8e5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # read_features always orders by created_at DESC with optional status /
+    # priority equality filters. Matching composite indexes let the planner
+    # do a backwards index scan straight into LIMIT with no Sort node.
+    op.execute('''
+        CREATE INDEX ix_feature_requests_status_created_at
+        ON feature_requests (status, created_at DESC)
+    ''')
+    op.execute('''
+        CREATE INDEX ix_feature_requests_priority_created_at
+        ON feature_requests (priority, created_at DESC)
+    ''')
+    op.execute('''
+        CREATE INDEX ix_feature_requests_created_at
+        ON feature_requests (created_at DESC)
+    ''')
+    # Backs the ILIKE '%term%' search on title/description
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.execute('''
+        CREATE INDEX ix_feature_requests_search_trgm
+        ON feature_requests
+        USING gin (title gin_trgm_ops, description gin_trgm_ops)
+    ''')
+
+
+def downgrade() -> None:
+    op.execute('DROP INDEX IF EXISTS ix_feature_requests_search_trgm')
+    op.execute('DROP INDEX IF EXISTS ix_feature_requests_created_at')
+    op.execute('DROP INDEX IF EXISTS ix_feature_requests_priority_created_at')
+    op.execute('DROP INDEX IF EXISTS ix_feature_requests_status_created_at')
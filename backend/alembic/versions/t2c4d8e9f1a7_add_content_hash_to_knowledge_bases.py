@@ -0,0 +1,27 @@
+"""Add content_hash to knowledge_bases for no-op reprocess detection
+
+Revision ID: t2c4d8e9f1a7
+Revises: s1b3c7d8e9f6
+Create Date: 2025-12-05 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 't2c4d8e9f1a7'
+down_revision = 's1b3c7d8e9f6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # SHA-256 of the extracted upload content; lets reprocess skip the LLM
+    # formatting and embedding work when the file is byte-identical.
+    # Nullable: existing rows simply reprocess fully once.
+    op.add_column('knowledge_bases', sa.Column('content_hash', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('knowledge_bases', 'content_hash')
@@ -0,0 +1,30 @@
+"""Add precomputed slug to knowledge_bases
+
+Revision ID: u3d5e9f1a2b8
+Revises: t2c4d8e9f1a7
+Create Date: 2025-12-09 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'u3d5e9f1a2b8'
+down_revision = 't2c4d8e9f1a7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Filename-safe form of name, used for download Content-Disposition.
+    # Maintained by the create/rename handlers; backfilled here with the
+    # same character class the router uses.
+    op.add_column('knowledge_bases', sa.Column('slug', sa.String(), nullable=True))
+    op.execute(
+        "UPDATE knowledge_bases SET slug = regexp_replace(name, '[^\\w.-]+', '_', 'g')"
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('knowledge_bases', 'slug')
@@ -0,0 +1,34 @@
+"""Add partial indexes for active-user listing
+
+Revision ID: v4e6f1a2b3c9
+Revises: u3d5e9f1a2b8
+Create Date: 2025-12-09 00:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'v4e6f1a2b3c9'
+down_revision = 'u3d5e9f1a2b8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Keyset pagination in list_users / list_developers scans
+    # (is_active, [role,] id > cursor ORDER BY id LIMIT n); partial indexes
+    # keep inactive rows out of the index entirely.
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_users_active_id "
+        "ON users (id) WHERE is_active"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_users_active_role_id "
+        "ON users (role, id) WHERE is_active"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_users_active_role_id")
+    op.execute("DROP INDEX IF EXISTS ix_users_active_id")
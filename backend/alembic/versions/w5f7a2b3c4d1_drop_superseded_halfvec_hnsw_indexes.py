@@ -0,0 +1,50 @@
+"""Drop halfvec HNSW indexes superseded by the bit-quantized prefilter
+
+Revision ID: w5f7a2b3c4d1
+Revises: v4e6f1a2b3c9
+Create Date: 2025-12-09 00:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'w5f7a2b3c4d1'
+down_revision = 'v4e6f1a2b3c9'
+branch_labels = None
+depends_on = None
+
+# Keep in sync with VALID_DOMAINS in app/schemas/knowledge_base.py
+DOMAINS = ["backend", "frontend", "database", "devops", "api", "mobile", "infrastructure", "ai", "general"]
+
+
+def upgrade() -> None:
+    # Since the two-stage search rewrite, every vector query ANN-scans only
+    # ix_kemb_bit_hnsw (domain filtering happens inside the prefilter
+    # subquery) and re-ranks the candidate pool with a plain top-N sort on
+    # the fp16 column. The full-table halfvec graph and the nine per-domain
+    # partial graphs are never chosen by any query but still cost ten HNSW
+    # insertions per embedding written, so drop them.
+    op.execute('DROP INDEX IF EXISTS ix_knowledge_embeddings_vector')
+    for domain in DOMAINS:
+        op.execute(f'DROP INDEX IF EXISTS ix_kemb_hnsw_{domain}')
+
+
+def downgrade() -> None:
+    # Recreate as o6d8e3f4a5b2 left them (inner-product opclass).
+    op.execute("SET maintenance_work_mem = '2GB'")
+    op.execute('SET max_parallel_maintenance_workers = 7')
+    op.execute('''
+        CREATE INDEX ix_knowledge_embeddings_vector
+        ON knowledge_embeddings
+        USING hnsw (embedding halfvec_ip_ops)
+        WITH (m = 24, ef_construction = 128)
+    ''')
+    for domain in DOMAINS:
+        op.execute(f'''
+            CREATE INDEX ix_kemb_hnsw_{domain}
+            ON knowledge_embeddings
+            USING hnsw (embedding halfvec_ip_ops)
+            WITH (m = 24, ef_construction = 128)
+            WHERE domain = '{domain}'
+        ''')
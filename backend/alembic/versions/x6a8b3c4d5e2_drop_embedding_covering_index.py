@@ -0,0 +1,33 @@
+"""Drop the embedding metadata covering index superseded by the rescore join
+
+Revision ID: x6a8b3c4d5e2
+Revises: w5f7a2b3c4d1
+Create Date: 2025-12-09 00:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'x6a8b3c4d5e2'
+down_revision = 'w5f7a2b3c4d1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # The covering index existed so post-ANN metadata lookups could be
+    # index-only scans. Since the two-stage rewrite the join back by id also
+    # reads ke.embedding for the fp16 rescore, so the lookup always hits the
+    # heap and the primary-key index serves the join just as well - leaving
+    # the covering index as pure write overhead on every embedding insert.
+    op.execute('DROP INDEX IF EXISTS ix_knowledge_embeddings_cover')
+
+
+def downgrade() -> None:
+    # Recreate as m4b6c1d2e3f9 defined it.
+    op.execute('''
+        CREATE INDEX ix_knowledge_embeddings_cover
+        ON knowledge_embeddings (id)
+        INCLUDE (kb_id, section_address, section_title)
+    ''')
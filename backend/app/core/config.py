@@ -1,18 +1,28 @@
 import os
+from functools import lru_cache
+from pydantic import model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import Optional, List
+from typing import Optional
 
+# backend/ directory, resolved once at import
+_BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@lru_cache(maxsize=1)
 def get_env_file():
-    """Determine which .env file to load based on APP_ENV variable."""
-    base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    """Determine which .env file to load based on APP_ENV variable.
+
+    Cached: the result can't change within a process, and the os.path.exists
+    probe is a syscall we don't want to repeat if Settings is constructed
+    more than once (tests, worker spawn).
+    """
     app_env = os.getenv("APP_ENV", "dev")  # Default to dev
-    
-    env_file = os.path.join(base_dir, f".env.{app_env}")
-    
+
+    env_file = os.path.join(_BASE_DIR, f".env.{app_env}")
+
     # Fallback to .env if environment-specific file doesn't exist
     if not os.path.exists(env_file):
-        env_file = os.path.join(base_dir, ".env")
-    
+        env_file = os.path.join(_BASE_DIR, ".env")
+
     return env_file
 
 class Settings(BaseSettings):
@@ -20,6 +30,9 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
+    # bcrypt cost factor; 12 is ~250ms per hash on typical hardware, each
+    # increment doubles it. Existing hashes are migrated on next login.
+    BCRYPT_ROUNDS: int = 12
 
     # AI API Keys - provider is auto-detected based on which key is set
     OPENAI_API_KEY: Optional[str] = None
@@ -35,19 +48,34 @@ class Settings(BaseSettings):
     GENAI_EMBEDDING_MODEL: str = "models/gemini-embedding-001"
     EMBEDDING_DIMENSIONS: int = 1024
 
+    # HNSW search-time candidate list size (pgvector defaults to 40, which can
+    # make the planner fall back to a seq scan on filtered queries)
+    HNSW_EF_SEARCH: int = 100
+    # Iterative scan keeps expanding the candidate pool until enough rows pass
+    # the query's filters (pgvector >= 0.8; ignored on older versions)
+    HNSW_ITERATIVE_SCAN: str = "relaxed_order"
+    HNSW_MAX_SCAN_TUPLES: int = 20000
+
+    # How long cached document embeddings stay valid (seconds). Content is
+    # addressed by hash, so this only bounds memory, not correctness.
+    EMBEDDING_CACHE_TTL: int = 24 * 3600
+
     # Admin emails (comma-separated list) - these users can grant approver role
     ADMIN_EMAILS: str = ""
-    
-    @property
-    def admin_email_list(self) -> List[str]:
-        """Parse comma-separated admin emails into a list"""
-        if not self.ADMIN_EMAILS:
-            return []
-        return [email.strip().lower() for email in self.ADMIN_EMAILS.split(",") if email.strip()]
-    
+    # Parsed once at construction; is_admin_email (called on every auth /
+    # permission check) is then an O(1) set lookup
+    admin_email_set: frozenset = frozenset()
+
+    @model_validator(mode="after")
+    def _parse_admin_emails(self):
+        self.admin_email_set = frozenset(
+            email.strip().lower() for email in self.ADMIN_EMAILS.split(",") if email.strip()
+        )
+        return self
+
     def is_admin_email(self, email: str) -> bool:
         """Check if an email is in the admin list"""
-        return email.lower() in self.admin_email_list
+        return email.lower() in self.admin_email_set
 
     model_config = SettingsConfigDict(
         env_file=get_env_file(),
@@ -37,10 +37,18 @@ PERMISSIONS = {
     "grant_approver": [],  # Controlled by ADMIN_EMAILS in config
 }
 
+# Precomputed at import: action -> frozenset of role values, so per-request
+# checks are a single O(1) set lookup instead of rebuilding a list each call
+_PERMISSION_ROLE_SETS = {
+    action: frozenset(r.value for r in roles)
+    for action, roles in PERMISSIONS.items()
+}
+
+_EMPTY_ROLE_SET = frozenset()
+
 def check_permission(user, action: str) -> bool:
     """Check if user has permission to perform action"""
-    allowed_roles = PERMISSIONS.get(action, [])
-    return user.role in [r.value for r in allowed_roles]
+    return user.role in _PERMISSION_ROLE_SETS.get(action, _EMPTY_ROLE_SET)
 
 def require_permission(action: str):
     """Dependency to require permission for an action"""
@@ -55,8 +63,9 @@ def require_permission(action: str):
 
 def require_role(*roles: UserRole):
     """Dependency to require specific role(s)"""
+    allowed = frozenset(r.value for r in roles)
     def role_checker(current_user):
-        if current_user.role not in [r.value for r in roles]:
+        if current_user.role not in allowed:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Insufficient permissions"
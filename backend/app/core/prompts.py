@@ -153,25 +153,45 @@ Feature: {context}""",
 }
 
 
+# Category registry, built once at import so get_prompt doesn't rebuild the
+# dict on every call
+PROMPT_CATEGORIES = {
+    "feature": FEATURE_PROMPTS,
+    "comment": COMMENT_PROMPTS,
+    "status": STATUS_PROMPTS,
+}
+
+# Every template above has a single {context} placeholder, so we can split
+# each one into a (prefix, suffix) pair at import and assemble prompts with
+# plain concatenation instead of re-parsing the format string per call.
+_COMPILED = {
+    category: {
+        action: tuple(template.split("{context}", 1))
+        for action, template in prompts.items()
+        if template.count("{context}") == 1 and template.count("{") == 1
+    }
+    for category, prompts in PROMPT_CATEGORIES.items()
+}
+
+
 def get_prompt(category: str, action: str, **kwargs) -> str:
     """
     Get a formatted prompt by category and action.
-    
+
     Args:
         category: The prompt category (feature, comment, status)
         action: The specific action/prompt name
         **kwargs: Variables to format into the prompt
-    
+
     Returns:
         Formatted prompt string
     """
-    prompts = {
-        "feature": FEATURE_PROMPTS,
-        "comment": COMMENT_PROMPTS,
-        "status": STATUS_PROMPTS,
-    }
-    
-    category_prompts = prompts.get(category, {})
+    compiled = _COMPILED.get(category, {}).get(action)
+    if compiled is not None and "context" in kwargs:
+        prefix, suffix = compiled
+        return prefix + kwargs["context"] + suffix
+
+    category_prompts = PROMPT_CATEGORIES.get(category, {})
     prompt_template = category_prompts.get(action, "{action}:\n\n{context}")
-    
+
     return prompt_template.format(**kwargs)
@@ -4,11 +4,24 @@ from jose import JWTError, jwt
 from passlib.context import CryptContext
 from .config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Cost factor is configurable so login latency can be tuned to an SLO
+# (each +1 doubles hashing time). Hashes remember their own cost, so
+# lowering/raising it only affects new hashes; verify_and_update migrates
+# old ones on successful login.
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.BCRYPT_ROUNDS,
+)
 
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
+def verify_and_update_password(plain_password, hashed_password):
+    """Verify and, if the stored hash uses an outdated cost, return a
+    replacement hash to persist. Returns (valid, new_hash_or_None)."""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
 def get_password_hash(password):
     return pwd_context.hash(password)
 
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Enum, JSON
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Enum
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import relationship
 from ..core.database import Base
 import enum
@@ -28,9 +29,15 @@ class FeatureRequest(Base):
     title = Column(String, index=True)
     description = Column(Text)
     use_case = Column(Text, nullable=True)
-    status = Column(String, default=FeatureStatus.SUBMITTED)
-    priority = Column(String, default=Priority.MEDIUM)
-    tags = Column(JSON, default=list)  # Store as JSON array
+    status = Column(
+        Enum(FeatureStatus, name="feature_status", values_callable=lambda e: [m.value for m in e]),
+        default=FeatureStatus.SUBMITTED
+    )
+    priority = Column(
+        Enum(Priority, name="priority", values_callable=lambda e: [m.value for m in e]),
+        default=Priority.MEDIUM
+    )
+    tags = Column(ARRAY(String), default=list)  # Native array, GIN-indexed for tag filters
     
     # PM fields
     rejection_reason = Column(Text, nullable=True)
@@ -48,6 +55,16 @@ class FeatureRequest(Base):
     comments = relationship("Comment", back_populates="feature", cascade="all, delete-orphan")
     attachments = relationship("Attachment", back_populates="feature", cascade="all, delete-orphan")
 
+    # Exposed so response schemas can serialize ORM rows directly
+    # (from_attributes) without a per-row enrichment dict in the router
+    @property
+    def requester_name(self):
+        return self.requester.full_name if self.requester else None
+
+    @property
+    def assigned_to_name(self):
+        return self.assigned_to.full_name if self.assigned_to else None
+
 
 class Comment(Base):
     __tablename__ = "comments"
@@ -62,6 +79,10 @@ class Comment(Base):
     feature = relationship("FeatureRequest", back_populates="comments")
     user = relationship("User")
 
+    @property
+    def user_name(self):
+        return self.user.full_name if self.user else None
+
 
 class Attachment(Base):
     __tablename__ = "attachments"
@@ -6,17 +6,27 @@ Actual JSON/Markdown files are stored in /uploads/knowledge/ directory.
 Embeddings are stored separately with just the vector and reference path.
 """
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Index
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey
 from sqlalchemy.orm import relationship
-from pgvector.sqlalchemy import Vector
+from sqlalchemy.types import UserDefinedType
+from pgvector.sqlalchemy import HALFVEC
 from ..core.database import Base
 
 
+class Ltree(UserDefinedType):
+    """Minimal PostgreSQL ltree type (we only bind/read it as text)."""
+    cache_ok = True
+
+    def get_col_spec(self, **kw):
+        return "LTREE"
+
+
 class KnowledgeBase(Base):
     __tablename__ = "knowledge_bases"
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)  # Display name, e.g., "Backend Architecture"
+    slug = Column(String, nullable=True)  # Filename-safe form of name, maintained on create/rename
     domain = Column(String, nullable=False)  # e.g., "backend", "frontend", "devops", "database"
     description = Column(Text, nullable=True)  # Brief description of what this KB covers
     
@@ -27,6 +37,7 @@ class KnowledgeBase(Base):
     
     # Metadata
     version = Column(Integer, default=1)  # Version number for tracking updates
+    content_hash = Column(String, nullable=True)  # SHA-256 of raw upload bytes; reprocess skips AI work when unchanged
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -55,20 +66,28 @@ class KnowledgeEmbedding(Base):
     
     # Section reference (path in JSON structure, e.g., "1.2.3")
     section_address = Column(String, nullable=False)
+
+    # Same path as ltree for indexed prefix/ancestor queries (GiST index in
+    # migrations). Labels are [A-Za-z0-9_] only, dot-separated.
+    section_path = Column(Ltree, nullable=True)
     
     # Section title for quick display without loading JSON
     section_title = Column(String, nullable=False)
+
+    # Denormalized from knowledge_bases.domain so domain-filtered vector
+    # searches can hit the per-domain partial HNSW indexes without a join
+    domain = Column(String, nullable=False, server_default="general")
     
-    # The embedding vector (1024 dimensions - both OpenAI and GenAI support custom dims)
-    embedding = Column(Vector(1024), nullable=False)
+    # The embedding vector (1024 dimensions - both OpenAI and GenAI support custom dims).
+    # Stored as halfvec (fp16) to halve index size and memory bandwidth; write
+    # paths pass fp32 lists and pgvector casts server-side.
+    embedding = Column(HALFVEC(1024), nullable=False)
     
     # Timestamp
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationships
     knowledge_base = relationship("KnowledgeBase", back_populates="embeddings")
-    
-    # Index for vector similarity search
-    __table_args__ = (
-        Index('ix_knowledge_embeddings_kb_id', 'kb_id'),
-    )
+
+    # Indexes (kb_id B-tree, HNSW vector indexes) are created by the Alembic
+    # migrations; don't re-declare them here or create_all would duplicate them.
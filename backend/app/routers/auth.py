@@ -1,25 +1,60 @@
+import logging
+import threading
+import time
 from datetime import timedelta
 from typing import Optional
+from cachetools import TTLCache
 from jose import JWTError, jwt
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from ..core import security, database, config
 from ..models import user as models
 from ..schemas import user as schemas
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
-ALLOWED_DOMAINS = ["mystiqueai.com", "konsultera.in"]
+ALLOWED_DOMAINS = frozenset({"mystiqueai.com", "konsultera.in"})
+
+# Decoded-JWT cache: signature verification + JSON parse runs once per token
+# per minute instead of on every request. Cache hits re-check the payload's
+# exp claim, so a token never outlives its expiry by the cache TTL.
+_token_cache: TTLCache = TTLCache(maxsize=10_000, ttl=60)
+_token_cache_lock = threading.Lock()
+
+# email -> user id, so repeat requests resolve the user by primary key
+# instead of the email B-tree lookup. Only the immutable mapping is cached;
+# the row itself is re-fetched, so role/name changes apply immediately and
+# deleted users fall through to the 401 below.
+_user_id_cache: TTLCache = TTLCache(maxsize=5000, ttl=30)
+_user_id_cache_lock = threading.Lock()
+
+
+def _decode_token(token: str) -> dict:
+    """Decode and verify a JWT, caching the payload briefly per raw token."""
+    with _token_cache_lock:
+        payload = _token_cache.get(token)
+    if payload is not None and payload.get("exp", 0) > time.time():
+        return payload
+    # Miss, or cached token expired mid-TTL: re-decode so jose raises
+    # ExpiredSignatureError and the caller 401s
+    payload = jwt.decode(token, config.settings.SECRET_KEY, algorithms=[config.settings.ALGORITHM])
+    with _token_cache_lock:
+        _token_cache[token] = payload
+    return payload
 
 def get_user_by_email(db: Session, email: str):
     return db.query(models.User).filter(models.User.email == email).first()
 
 def is_allowed_domain(email: str) -> bool:
-    domain = email.split('@')[1] if '@' in email else ''
-    return domain in ALLOWED_DOMAINS
+    # rpartition avoids the list allocation of split and handles no-@ input
+    _, sep, domain = email.rpartition('@')
+    return bool(sep) and domain.lower() in ALLOWED_DOMAINS
 
 @router.post("/token", response_model=dict)
 async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(database.get_db)):
@@ -30,14 +65,15 @@ async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(
     if not is_allowed_domain(email):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
-            detail=f"Only {', '.join(ALLOWED_DOMAINS)} email addresses are allowed",
+            detail=f"Only {', '.join(sorted(ALLOWED_DOMAINS))} email addresses are allowed",
         )
     
     user = get_user_by_email(db, email)
     
     # Auto-register if user doesn't exist
     if not user:
-        hashed_password = security.get_password_hash(password)
+        # bcrypt is hundreds of ms of CPU; keep it off the event loop
+        hashed_password = await run_in_threadpool(security.get_password_hash, password)
         user = models.User(
             email=email,
             hashed_password=hashed_password,
@@ -46,12 +82,20 @@ async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(
         db.add(user)
         db.commit()
         db.refresh(user)
-    elif not security.verify_password(password, user.hashed_password):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Incorrect password",
-            headers={"WWW-Authenticate": "Bearer"},
+    else:
+        valid, new_hash = await run_in_threadpool(
+            security.verify_and_update_password, password, user.hashed_password
         )
+        if not valid:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Incorrect password",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        # Transparently migrate hashes created under an older cost factor
+        if new_hash:
+            user.hashed_password = new_hash
+            db.commit()
     
     access_token_expires = timedelta(minutes=config.settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = security.create_access_token(
@@ -60,7 +104,8 @@ async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(
     return {"access_token": access_token, "token_type": "bearer"}
 
 async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(database.get_db)):
-    print(f"[AUTH DEBUG] Token received: {token[:20]}..." if token and len(token) > 20 else f"[AUTH DEBUG] Token: {token}")
+    # %s-style args so nothing is formatted unless DEBUG is enabled
+    logger.debug("Token prefix: %s", token[:20] if token else None)
     
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -68,23 +113,31 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, config.settings.SECRET_KEY, algorithms=[config.settings.ALGORITHM])
+        payload = _decode_token(token)
         email: str = payload.get("sub")
-        print(f"[AUTH DEBUG] Decoded email: {email}")
+        logger.debug("Decoded email: %s", email)
         if email is None:
-            print("[AUTH DEBUG] Email is None in token payload")
+            logger.debug("Email is None in token payload")
             raise credentials_exception
     except JWTError as e:
-        print(f"[AUTH DEBUG] JWT decode error: {e}")
+        logger.debug("JWT decode error: %s", e)
         raise credentials_exception
     except Exception as e:
-        print(f"[AUTH DEBUG] Unexpected error: {e}")
+        logger.debug("Unexpected error decoding token: %s", e)
         raise credentials_exception
     
-    user = get_user_by_email(db, email=email)
+    with _user_id_cache_lock:
+        cached_id = _user_id_cache.get(email)
+    if cached_id is not None:
+        user = db.get(models.User, cached_id)
+    else:
+        user = get_user_by_email(db, email=email)
+        if user is not None:
+            with _user_id_cache_lock:
+                _user_id_cache[email] = user.id
     if user is None:
-        print(f"[AUTH DEBUG] User not found for email: {email}")
+        logger.debug("User not found for email: %s", email)
         raise credentials_exception
     
-    print(f"[AUTH DEBUG] User authenticated: {user.email}")
+    logger.debug("User authenticated: %s", user.email)
     return user
@@ -1,12 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, Response, status, Query, UploadFile, File
 from fastapi.responses import FileResponse
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy import exists, or_, tuple_, update
+from sqlalchemy.exc import IntegrityError
 from typing import List, Optional
 from pydantic import BaseModel
+import asyncio
+import logging
 import os
 import uuid
 import aiofiles
+import aiofiles.os
 from ..core import database
 from ..core.prompts import FEATURE_PROMPTS, get_prompt
 from ..models import feature as models
@@ -16,6 +20,8 @@ from .auth import get_current_user
 from ..services.ai_service import ai_service
 from .knowledge_base import search_knowledge_base_internal
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 # AI Request Schema
@@ -24,9 +30,73 @@ class AIRequest(BaseModel):
     context: str
     complexity: str = "low"  # low, medium, high
 
+class AIBatchRequest(BaseModel):
+    items: List[AIRequest]
+
+# Actions that get relevant knowledge base documentation appended
+KB_ENABLED_ACTIONS = ["generate_tasks", "generate_feature"]
+
+MAX_AI_BATCH_ITEMS = 100
+
+
+def _build_kb_context(action: str, kb_results: list) -> str:
+    """Render KB search results into the documentation block for a prompt."""
+    if not kb_results:
+        return ""
+
+    kb_sections = []
+    for kb in kb_results:
+        kb_sections.append(
+            f"### {kb['kb_name']} (Domain: {kb['domain']}, Score: {kb['similarity_score']})\n"
+            f"{kb['content'][:2000]}"  # Limit content to avoid token overflow
+        )
+
+    if action == "generate_tasks":
+        return (
+            "\n\n---\n"
+            "## Relevant System Documentation\n"
+            "The following documentation describes the existing system architecture and components. "
+            "Use this context to create tasks that align with the current implementation:\n\n"
+            + "\n\n".join(kb_sections)
+        )
+    else:  # generate_feature
+        return (
+            "\n\n---\n"
+            "## Existing System Context\n"
+            "The following documentation describes the existing system. "
+            "Use this to ensure the feature description references relevant existing components and integrates well:\n\n"
+            + "\n\n".join(kb_sections)
+        )
+
+
+def _build_prompt(request: AIRequest, kb_context: str) -> str:
+    if request.action in FEATURE_PROMPTS:
+        base_prompt = get_prompt("feature", request.action, context=request.context)
+        return base_prompt + kb_context if kb_context else base_prompt
+    # Fallback for custom actions (like 'generate' for feature creation)
+    return request.context
+
+
+async def _run_ai_action(request: AIRequest, kb_results: list, base_prompt: str = None) -> dict:
+    """Assemble the prompt (with optional KB context) and call the LLM."""
+    kb_context = _build_kb_context(request.action, kb_results)
+    if base_prompt is None:
+        base_prompt = _build_prompt(request, "")
+    prompt = base_prompt + kb_context if kb_context else base_prompt
+    response = await ai_service.generate_text(prompt, request.complexity)
+
+    result = {"result": response}
+    if kb_context and request.action in KB_ENABLED_ACTIONS:
+        result["kb_context_used"] = [
+            {"name": kb["kb_name"], "domain": kb["domain"], "score": kb["similarity_score"]}
+            for kb in kb_results
+        ]
+    return result
+
+
 @router.post("/ai-assist")
 async def ai_assist(
-    request: AIRequest, 
+    request: AIRequest,
     db: Session = Depends(database.get_db),
     current_user: user_models.User = Depends(get_current_user)
 ):
@@ -34,72 +104,72 @@ async def ai_assist(
     AI-assisted actions for feature requests.
     For task generation, automatically fetches relevant knowledge base documentation.
     """
-    kb_context = ""
-    
-    # For task generation and feature creation, fetch relevant KB documentation first
-    kb_enabled_actions = ["generate_tasks", "generate_feature"]
     kb_results = []
-    
-    if request.action in kb_enabled_actions:
-        print(f"[AI Assist] Fetching KB context for {request.action}...")
-        kb_results = await search_knowledge_base_internal(
-            query=request.context,
-            db=db,
-            limit=5,
-            min_score=0.20  # 70% similarity cutoff
+    base_prompt = None
+    if request.action in KB_ENABLED_ACTIONS:
+        logger.debug("Fetching KB context for %s...", request.action)
+        # The base prompt doesn't depend on the KB result, so build it while
+        # the search (embedding API + vector query) is in flight
+        kb_results, base_prompt = await asyncio.gather(
+            search_knowledge_base_internal(
+                query=request.context,
+                db=db,
+                limit=5,
+                min_score=0.20  # 70% similarity cutoff
+            ),
+            asyncio.to_thread(_build_prompt, request, ""),
         )
-        
         if kb_results:
-            print(f"[AI Assist] Found {len(kb_results)} relevant KB documents")
-            kb_sections = []
-            for kb in kb_results:
-                kb_sections.append(
-                    f"### {kb['kb_name']} (Domain: {kb['domain']}, Score: {kb['similarity_score']})\n"
-                    f"{kb['content'][:2000]}"  # Limit content to avoid token overflow
-                )
-            
-            if request.action == "generate_tasks":
-                kb_context = (
-                    "\n\n---\n"
-                    "## Relevant System Documentation\n"
-                    "The following documentation describes the existing system architecture and components. "
-                    "Use this context to create tasks that align with the current implementation:\n\n"
-                    + "\n\n".join(kb_sections)
-                )
-            else:  # generate_feature
-                kb_context = (
-                    "\n\n---\n"
-                    "## Existing System Context\n"
-                    "The following documentation describes the existing system. "
-                    "Use this to ensure the feature description references relevant existing components and integrates well:\n\n"
-                    + "\n\n".join(kb_sections)
-                )
-        else:
-            print("[AI Assist] No KB documents found above 70% threshold")
-    
-    # Build the prompt
-    if request.action in FEATURE_PROMPTS:
-        base_prompt = FEATURE_PROMPTS[request.action].format(context=request.context)
-        # Append KB context if available
-        if kb_context:
-            prompt = base_prompt + kb_context
+            logger.debug("Found %d relevant KB documents", len(kb_results))
         else:
-            prompt = base_prompt
-    else:
-        # Fallback for custom actions (like 'generate' for feature creation)
-        prompt = request.context
-    
-    response = await ai_service.generate_text(prompt, request.complexity)
-    
-    # Include KB metadata in response if context was used
-    result = {"result": response}
-    if kb_context and request.action in kb_enabled_actions:
-        result["kb_context_used"] = [
-            {"name": kb["kb_name"], "domain": kb["domain"], "score": kb["similarity_score"]}
-            for kb in kb_results
-        ]
-    
-    return result
+            logger.debug("No KB documents found above 70% threshold")
+
+    return await _run_ai_action(request, kb_results, base_prompt)
+
+
+@router.post("/ai-assist/batch")
+async def ai_assist_batch(
+    request: AIBatchRequest,
+    db: Session = Depends(database.get_db),
+    current_user: user_models.User = Depends(get_current_user)
+):
+    """
+    Run several AI-assist actions in one request. KB lookups are deduplicated
+    across items sharing a context (the common case: generate_tasks +
+    generate_feature on the same brief) and the LLM calls run concurrently.
+    """
+    if len(request.items) > MAX_AI_BATCH_ITEMS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Batch size exceeds {MAX_AI_BATCH_ITEMS} items"
+        )
+
+    # One KB search per distinct context, not per item
+    kb_contexts = list({
+        item.context for item in request.items if item.action in KB_ENABLED_ACTIONS
+    })
+    searches = await asyncio.gather(
+        *[
+            search_knowledge_base_internal(query=context, db=db, limit=5, min_score=0.20)
+            for context in kb_contexts
+        ],
+        return_exceptions=True
+    )
+    kb_results_by_context = {
+        context: (results if not isinstance(results, Exception) else [])
+        for context, results in zip(kb_contexts, searches)
+    }
+
+    # Only KB-enabled actions get the documentation block; a summarize item
+    # sharing a context with a generate_tasks item must not inherit it
+    results = await asyncio.gather(*[
+        _run_ai_action(
+            item,
+            kb_results_by_context.get(item.context, []) if item.action in KB_ENABLED_ACTIONS else []
+        )
+        for item in request.items
+    ])
+    return {"results": results}
 
 @router.post("/", response_model=schemas.FeatureRequest)
 def create_feature(
@@ -108,45 +178,32 @@ def create_feature(
     current_user: user_models.User = Depends(get_current_user)
 ):
     feature_data = feature.model_dump()
-    db_feature = models.FeatureRequest(**feature_data, requester_id=current_user.id)
+    # Pass the relationship (not just the FK) so requester_name serializes
+    # without a lazy load
+    db_feature = models.FeatureRequest(**feature_data, requester=current_user)
     db.add(db_feature)
     db.commit()
-    db.refresh(db_feature)
-    return _enrich_feature(db_feature)
-
-def _enrich_feature(feature: models.FeatureRequest) -> dict:
-    """Add requester_name and assigned_to_name to feature"""
-    data = {
-        "id": feature.id,
-        "title": feature.title,
-        "description": feature.description,
-        "use_case": feature.use_case,
-        "status": feature.status,
-        "priority": feature.priority,
-        "tags": feature.tags or [],
-        "rejection_reason": feature.rejection_reason,
-        "approval_notes": feature.approval_notes,
-        "acceptance_criteria": feature.acceptance_criteria,
-        "created_at": feature.created_at,
-        "updated_at": feature.updated_at,
-        "requester_id": feature.requester_id,
-        "assigned_to_id": feature.assigned_to_id,
-        "requester_name": feature.requester.full_name if feature.requester else None,
-        "assigned_to_name": feature.assigned_to.full_name if feature.assigned_to else None,
-    }
-    return data
+    return db_feature
 
 @router.get("/", response_model=List[schemas.FeatureRequest])
 def read_features(
+    response: Response,
     skip: int = 0, 
     limit: int = 100,
-    status: Optional[str] = Query(None),
-    priority: Optional[str] = Query(None),
+    cursor: Optional[int] = Query(None, description="id of the last feature from the previous page"),
+    status: Optional[models.FeatureStatus] = Query(None),
+    priority: Optional[models.Priority] = Query(None),
     search: Optional[str] = Query(None),
     db: Session = Depends(database.get_db),
     current_user: user_models.User = Depends(get_current_user)
 ):
-    query = db.query(models.FeatureRequest)
+    # Eager-load the two user relationships the response schema needs, so a
+    # 100-row page is 1 query instead of 1 + 2N lazy loads; only the joined
+    # users' names are projected, not the rest of the users row
+    query = db.query(models.FeatureRequest).options(
+        joinedload(models.FeatureRequest.requester).load_only(user_models.User.full_name),
+        joinedload(models.FeatureRequest.assigned_to).load_only(user_models.User.full_name),
+    )
     
     # Apply filters
     if status:
@@ -162,8 +219,30 @@ def read_features(
             )
         )
     
-    features = query.order_by(models.FeatureRequest.created_at.desc()).offset(skip).limit(limit).all()
-    return [_enrich_feature(f) for f in features]
+    # Keyset pagination: seek past the cursor row instead of OFFSET, which
+    # re-scans and discards `skip` rows on every page. skip remains for
+    # clients that haven't adopted the cursor yet.
+    if cursor is not None:
+        cursor_row = db.query(models.FeatureRequest.created_at).filter(
+            models.FeatureRequest.id == cursor
+        ).first()
+        if cursor_row is not None:
+            query = query.filter(
+                tuple_(models.FeatureRequest.created_at, models.FeatureRequest.id)
+                < (cursor_row.created_at, cursor)
+            )
+    else:
+        query = query.offset(skip)
+
+    # response_model serializes the ORM rows directly (from_attributes);
+    # requester_name/assigned_to_name are properties on the model
+    features = query.order_by(
+        models.FeatureRequest.created_at.desc(),
+        models.FeatureRequest.id.desc(),
+    ).limit(limit).all()
+    if len(features) == limit:
+        response.headers["X-Next-Cursor"] = str(features[-1].id)
+    return features
 
 @router.get("/{feature_id}", response_model=schemas.FeatureRequestWithComments)
 def read_feature(
@@ -171,23 +250,16 @@ def read_feature(
     db: Session = Depends(database.get_db),
     current_user: user_models.User = Depends(get_current_user)
 ):
-    feature = db.query(models.FeatureRequest).filter(models.FeatureRequest.id == feature_id).first()
+    feature = db.query(models.FeatureRequest).options(
+        joinedload(models.FeatureRequest.requester).load_only(user_models.User.full_name),
+        joinedload(models.FeatureRequest.assigned_to).load_only(user_models.User.full_name),
+        # selectinload for the collection to avoid row multiplication, then
+        # a joined load for each comment's author
+        selectinload(models.FeatureRequest.comments).joinedload(models.Comment.user).load_only(user_models.User.full_name),
+    ).filter(models.FeatureRequest.id == feature_id).first()
     if feature is None:
         raise HTTPException(status_code=404, detail="Feature not found")
-    
-    enriched = _enrich_feature(feature)
-    enriched["comments"] = [
-        {
-            "id": c.id,
-            "content": c.content,
-            "created_at": c.created_at,
-            "feature_id": c.feature_id,
-            "user_id": c.user_id,
-            "user_name": c.user.full_name if c.user else None
-        }
-        for c in feature.comments
-    ]
-    return enriched
+    return feature
 
 @router.put("/{feature_id}", response_model=schemas.FeatureRequest)
 def update_feature(
@@ -205,8 +277,7 @@ def update_feature(
         setattr(db_feature, key, value)
 
     db.commit()
-    db.refresh(db_feature)
-    return _enrich_feature(db_feature)
+    return db_feature
 
 @router.post("/{feature_id}/transition", response_model=schemas.FeatureRequest)
 def transition_status(
@@ -216,20 +287,25 @@ def transition_status(
     current_user: user_models.User = Depends(get_current_user)
 ):
     """Transition feature to a new status with optional reason"""
-    db_feature = db.query(models.FeatureRequest).filter(models.FeatureRequest.id == feature_id).first()
-    if db_feature is None:
-        raise HTTPException(status_code=404, detail="Feature not found")
-    
-    db_feature.status = transition.status
-    
+    # Single conditional UPDATE..RETURNING instead of SELECT-then-UPDATE;
+    # a missing id simply returns no row
+    values = {"status": transition.status}
     if transition.status == models.FeatureStatus.REJECTED and transition.reason:
-        db_feature.rejection_reason = transition.reason
+        values["rejection_reason"] = transition.reason
     elif transition.status == models.FeatureStatus.APPROVED and transition.reason:
-        db_feature.approval_notes = transition.reason
-    
+        values["approval_notes"] = transition.reason
+
+    db_feature = db.execute(
+        update(models.FeatureRequest)
+        .where(models.FeatureRequest.id == feature_id)
+        .values(**values)
+        .returning(models.FeatureRequest)
+    ).scalar_one_or_none()
+    if db_feature is None:
+        db.rollback()
+        raise HTTPException(status_code=404, detail="Feature not found")
     db.commit()
-    db.refresh(db_feature)
-    return _enrich_feature(db_feature)
+    return db_feature
 
 @router.post("/{feature_id}/assign", response_model=schemas.FeatureRequest)
 def assign_feature(
@@ -239,19 +315,25 @@ def assign_feature(
     current_user: user_models.User = Depends(get_current_user)
 ):
     """Assign feature to a developer"""
-    db_feature = db.query(models.FeatureRequest).filter(models.FeatureRequest.id == feature_id).first()
+    # The user check rides along as an EXISTS guard, so the happy path is
+    # one UPDATE instead of two SELECTs plus an UPDATE
+    db_feature = db.execute(
+        update(models.FeatureRequest)
+        .where(
+            models.FeatureRequest.id == feature_id,
+            exists().where(user_models.User.id == user_id),
+        )
+        .values(assigned_to_id=user_id)
+        .returning(models.FeatureRequest)
+    ).scalar_one_or_none()
     if db_feature is None:
-        raise HTTPException(status_code=404, detail="Feature not found")
-    
-    # Verify user exists
-    user = db.query(user_models.User).filter(user_models.User.id == user_id).first()
-    if user is None:
+        db.rollback()
+        # Rare error path: tell the caller which precondition failed
+        if db.query(models.FeatureRequest.id).filter(models.FeatureRequest.id == feature_id).first() is None:
+            raise HTTPException(status_code=404, detail="Feature not found")
         raise HTTPException(status_code=404, detail="User not found")
-    
-    db_feature.assigned_to_id = user_id
     db.commit()
-    db.refresh(db_feature)
-    return _enrich_feature(db_feature)
+    return db_feature
 
 # Comments endpoints
 @router.post("/{feature_id}/comments", response_model=schemas.Comment)
@@ -261,27 +343,20 @@ def add_comment(
     db: Session = Depends(database.get_db),
     current_user: user_models.User = Depends(get_current_user)
 ):
-    db_feature = db.query(models.FeatureRequest).filter(models.FeatureRequest.id == feature_id).first()
-    if db_feature is None:
-        raise HTTPException(status_code=404, detail="Feature not found")
-    
+    # No existence pre-SELECT: the comments.feature_id FK enforces it, and a
+    # violation converts to the same 404
     db_comment = models.Comment(
         content=comment.content,
         feature_id=feature_id,
-        user_id=current_user.id
+        user=current_user
     )
     db.add(db_comment)
-    db.commit()
-    db.refresh(db_comment)
-    
-    return {
-        "id": db_comment.id,
-        "content": db_comment.content,
-        "created_at": db_comment.created_at,
-        "feature_id": db_comment.feature_id,
-        "user_id": db_comment.user_id,
-        "user_name": current_user.full_name
-    }
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=404, detail="Feature not found")
+    return db_comment
 
 @router.get("/{feature_id}/comments", response_model=List[schemas.Comment])
 def get_comments(
@@ -289,18 +364,7 @@ def get_comments(
     db: Session = Depends(database.get_db),
     current_user: user_models.User = Depends(get_current_user)
 ):
-    comments = db.query(models.Comment).filter(models.Comment.feature_id == feature_id).order_by(models.Comment.created_at.desc()).all()
-    return [
-        {
-            "id": c.id,
-            "content": c.content,
-            "created_at": c.created_at,
-            "feature_id": c.feature_id,
-            "user_id": c.user_id,
-            "user_name": c.user.full_name if c.user else None
-        }
-        for c in comments
-    ]
+    return db.query(models.Comment).options(joinedload(models.Comment.user).load_only(user_models.User.full_name)).filter(models.Comment.feature_id == feature_id).order_by(models.Comment.created_at.desc()).all()
 
 # Attachments endpoints
 # Store feature attachments in uploads/attachments directory (similar to knowledge base in uploads/knowledge)
@@ -314,32 +378,35 @@ async def upload_attachment(
     db: Session = Depends(database.get_db),
     current_user: user_models.User = Depends(get_current_user)
 ):
-    db_feature = db.query(models.FeatureRequest).filter(models.FeatureRequest.id == feature_id).first()
-    if db_feature is None:
+    # Only need existence here (the file write must not happen for a bad
+    # id), so fetch just the pk instead of the whole row
+    if db.query(models.FeatureRequest.id).filter(models.FeatureRequest.id == feature_id).first() is None:
         raise HTTPException(status_code=404, detail="Feature not found")
     
-    # Generate unique filename
+    # Generate unique filename (.hex skips the dash formatting of str(uuid4))
     ext = os.path.splitext(file.filename)[1]
-    unique_filename = f"{uuid.uuid4()}{ext}"
+    unique_filename = uuid.uuid4().hex + ext
     file_path = os.path.join(UPLOAD_DIR, unique_filename)
     
-    # Save file
+    # Save file in 1 MiB chunks so peak memory stays bounded regardless of
+    # attachment size (file.read() would buffer the whole payload)
+    size = 0
     async with aiofiles.open(file_path, 'wb') as out_file:
-        content = await file.read()
-        await out_file.write(content)
-    
+        while chunk := await file.read(1 << 20):
+            await out_file.write(chunk)
+            size += len(chunk)
+
     # Create attachment record
     db_attachment = models.Attachment(
         filename=unique_filename,
         original_filename=file.filename,
         content_type=file.content_type,
-        size=len(content),
+        size=size,
         feature_id=feature_id,
         user_id=current_user.id
     )
     db.add(db_attachment)
     db.commit()
-    db.refresh(db_attachment)
     
     return {
         "id": db_attachment.id,
@@ -356,7 +423,7 @@ def get_attachments(
     db: Session = Depends(database.get_db),
     current_user: user_models.User = Depends(get_current_user)
 ):
-    attachments = db.query(models.Attachment).filter(models.Attachment.feature_id == feature_id).order_by(models.Attachment.created_at.desc()).all()
+    attachments = db.query(models.Attachment).options(joinedload(models.Attachment.user).load_only(user_models.User.full_name)).filter(models.Attachment.feature_id == feature_id).order_by(models.Attachment.created_at.desc()).all()
     return [
         {
             "id": a.id,
@@ -390,7 +457,7 @@ def download_attachment(
     )
 
 @router.delete("/attachments/{attachment_id}")
-def delete_attachment(
+async def delete_attachment(
     attachment_id: int,
     db: Session = Depends(database.get_db),
     current_user: user_models.User = Depends(get_current_user)
@@ -399,10 +466,10 @@ def delete_attachment(
     if attachment is None:
         raise HTTPException(status_code=404, detail="Attachment not found")
     
-    # Delete file
+    # Delete file without blocking the event loop on slow disks
     file_path = os.path.join(UPLOAD_DIR, attachment.filename)
-    if os.path.exists(file_path):
-        os.remove(file_path)
+    if await aiofiles.os.path.exists(file_path):
+        await aiofiles.os.remove(file_path)
     
     # Delete record
     db.delete(attachment)
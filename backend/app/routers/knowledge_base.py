@@ -4,15 +4,27 @@ Knowledge Base Router
 API endpoints for managing knowledge base documents.
 Files are stored in /uploads/knowledge/ directory, not in the database.
 """
+import asyncio
+import hashlib
+import io
+import logging
 import os
+import threading
+import re
 import uuid
-import json
 import aiofiles
+import aiofiles.os
+import json_repair
+import numpy as np
+import orjson
+from cachetools import TTLCache
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
-from fastapi.responses import FileResponse
-from sqlalchemy.orm import Session
+from fastapi.responses import FileResponse, ORJSONResponse
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session, joinedload, load_only, selectinload
 from typing import Optional, List
 from datetime import datetime
+from functools import lru_cache
 
 from ..core import database
 from ..core.config import settings
@@ -21,70 +33,53 @@ from ..models import knowledge_base as models
 from ..models import user as user_models
 from ..schemas import knowledge_base as schemas
 from .auth import get_current_user
+from ..services import embedding_cache
 from ..services.ai_service import ai_service
 
 
+logger = logging.getLogger(__name__)
+
+# Strips ```/```json fences around AI responses; compiled once
+_JSON_FENCE_RE = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+# Filename-unsafe runs collapse to a single underscore
+_SLUG_RE = re.compile(r"[^\w.-]+")
+
+
+def _slugify(name: str) -> str:
+    """Filename-safe form of a KB name, stored on the row at create/rename."""
+    return _SLUG_RE.sub("_", name)
+
+
 def parse_ai_json_response(ai_response: str) -> dict:
     """
-    Parse AI-generated JSON with multiple fallback attempts to handle common issues.
+    Parse AI-generated JSON tolerantly.
     Returns the parsed dictionary or raises HTTPException on failure.
     """
-    import re
-    import ast
-    
     # Clean up response (remove markdown code blocks if present)
-    cleaned_response = ai_response.strip()
-    if cleaned_response.startswith("```"):
-        cleaned_response = cleaned_response.split("```")[1]
-        if cleaned_response.startswith("json"):
-            cleaned_response = cleaned_response[4:]
-    cleaned_response = cleaned_response.strip()
-    
-    structure = None
-    parse_error = None
-    
-    # Attempt 1: Direct parse
+    cleaned_response = _JSON_FENCE_RE.sub("", ai_response.strip()).strip()
+
+    # Fast path: well-formed JSON through orjson's C parser
     try:
-        structure = json.loads(cleaned_response)
-        return structure
-    except json.JSONDecodeError as e:
+        return orjson.loads(cleaned_response)
+    except orjson.JSONDecodeError as e:
         parse_error = e
-        print(f"[KB DEBUG] Initial JSON parse failed: {e}")
-    
-    # Attempt 2: Fix common issues - unescaped newlines in strings
-    try:
-        # Replace literal newlines that are inside string values
-        fixed = re.sub(r'(?<!\\)\n(?=[^"]*"[,\}\]])', '\\n', cleaned_response)
-        structure = json.loads(fixed)
-        print("[KB DEBUG] JSON parsed after fixing newlines")
-        return structure
-    except json.JSONDecodeError:
-        pass
-    
-    # Attempt 3: Try to extract valid JSON portion
+        logger.debug("Initial JSON parse failed: %s", e)
+
+    # Single tolerant pass that fixes unescaped newlines, trailing commas,
+    # truncated output etc., instead of a cascade of whole-string regex
+    # repairs
     try:
-        start = cleaned_response.find('{')
-        end = cleaned_response.rfind('}')
-        if start != -1 and end != -1:
-            json_portion = cleaned_response[start:end+1]
-            structure = json.loads(json_portion)
-            print("[KB DEBUG] JSON parsed after extracting portion")
+        structure = json_repair.loads(cleaned_response)
+        if structure:
+            logger.debug("JSON parsed via json_repair")
             return structure
-    except json.JSONDecodeError:
+    except Exception:
         pass
-    
-    # Attempt 4: Use ast.literal_eval as last resort
-    try:
-        py_str = cleaned_response.replace('true', 'True').replace('false', 'False').replace('null', 'None')
-        structure = ast.literal_eval(py_str)
-        print("[KB DEBUG] JSON parsed via ast.literal_eval")
-        return structure
-    except:
-        pass
-    
+
     # All attempts failed
-    print(f"[KB DEBUG] All JSON parse attempts failed. Original error: {parse_error}")
-    print(f"[KB DEBUG] Cleaned response was: {cleaned_response[:500]}...")
+    logger.error("All JSON parse attempts failed. Original error: %s", parse_error)
+    logger.debug("Cleaned response was: %.500s...", cleaned_response)
     raise HTTPException(
         status_code=500,
         detail=f"AI response was not valid JSON. Please try again. Error: {str(parse_error)}"
@@ -95,7 +90,7 @@ def is_kb_admin(user: user_models.User) -> bool:
     """Check if user can manage knowledge bases (admin role OR env admin)"""
     is_role_admin = check_permission(user, "manage_users")
     is_env_admin = settings.is_admin_email(user.email)
-    print(f"[KB DEBUG] User: {user.email}, Role: {user.role}, is_role_admin: {is_role_admin}, is_env_admin: {is_env_admin}")
+    logger.debug("User: %s, Role: %s, is_role_admin: %s, is_env_admin: %s", user.email, user.role, is_role_admin, is_env_admin)
     return is_role_admin or is_env_admin
 
 
@@ -118,8 +113,11 @@ def structure_to_markdown(structure: dict) -> str:
     
     lines.append("")
     
-    def process_section(section: dict, depth: int = 0):
-        """Recursively convert section to markdown"""
+    # Explicit stack instead of recursion: no per-section Python frame, and
+    # deep structures can't hit the recursion limit
+    stack = [(section, 0) for section in reversed(structure.get("sections", []))]
+    while stack:
+        section, depth = stack.pop()
         section_id = section.get("id", "")
         title = section.get("title", "")
         content = section.get("content", "")
@@ -133,56 +131,313 @@ def structure_to_markdown(structure: dict) -> str:
             lines.append(content)
             lines.append("")
         
-        # Process subsections
-        for subsection in section.get("subsections", []):
-            process_section(subsection, depth + 1)
-    
-    for section in structure.get("sections", []):
-        process_section(section)
+        stack.extend(
+            (subsection, depth + 1)
+            for subsection in reversed(section.get("subsections", []))
+        )
     
     return "\n".join(lines)
 
 
+# Above this row count, bulk insert switches from multi-row INSERT to COPY
+_COPY_THRESHOLD = 200
+
+_EMBEDDING_COPY_SQL = (
+    "COPY knowledge_embeddings "
+    "(kb_id, section_address, section_path, section_title, domain, embedding, created_at) "
+    "FROM STDIN"
+)
+
+
+def _copy_escape(value) -> str:
+    """Escape one field for COPY text format (None becomes \\N)."""
+    if value is None:
+        return "\\N"
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def _bulk_insert_embeddings(db: Session, rows: List[dict]) -> int:
+    """
+    Insert embedding rows in one round trip. Small batches go through a
+    single multi-row INSERT; large regenerations stream through COPY FROM
+    STDIN, which skips per-row parse/plan work entirely. (COPY's binary
+    format with the pgvector adapter needs psycopg3; text format keeps
+    most of the win on psycopg2.)
+    """
+    if not rows:
+        return 0
+
+    if len(rows) < _COPY_THRESHOLD:
+        from sqlalchemy import insert
+        db.execute(insert(models.KnowledgeEmbedding), rows)
+        return len(rows)
+
+    buf = io.StringIO()
+    for row in rows:
+        buf.write("\t".join((
+            _copy_escape(row["kb_id"]),
+            _copy_escape(row["section_address"]),
+            _copy_escape(row["section_path"]),
+            _copy_escape(row["section_title"]),
+            _copy_escape(row["domain"]),
+            "[" + ",".join(map(str, row["embedding"])) + "]",
+            _copy_escape(row["created_at"]),
+        )))
+        buf.write("\n")
+    buf.seek(0)
+    # Raw psycopg2 cursor from the session's connection, so the COPY joins
+    # the session transaction and commits/rolls back with it
+    db.connection().connection.cursor().copy_expert(_EMBEDDING_COPY_SQL, buf)
+    return len(rows)
+
+
+def chunk_markdown(markdown: str, max_chars: int = 1500, overlap: int = 150) -> List[str]:
+    """
+    Split markdown into embedding-sized chunks, preferring ## / ### header
+    boundaries and falling back to overlapping character windows for long
+    header-free stretches.
+    """
+    import re
+
+    blocks = re.split(r'(?=\n#{2,3} )', markdown)
+
+    # Pack adjacent blocks up to max_chars so tiny sections share a chunk
+    packed = []
+    current = ""
+    for block in blocks:
+        if current and len(current) + len(block) > max_chars:
+            packed.append(current)
+            current = block
+        else:
+            current += block
+    if current:
+        packed.append(current)
+
+    chunks = []
+    step = max_chars - overlap
+    for piece in packed:
+        if len(piece) <= max_chars:
+            chunks.append(piece)
+        else:
+            for start in range(0, len(piece), step):
+                chunks.append(piece[start:start + max_chars])
+                if start + max_chars >= len(piece):
+                    break
+    return [c for c in chunks if c.strip()]
+
+
+@lru_cache(maxsize=128)
+def _load_structure(path: str, mtime: float) -> dict:
+    """
+    Parse a structure JSON file, cached on (path, mtime). Section navigation
+    hits the same file repeatedly as users walk the tree; the mtime key makes
+    invalidation automatic when a reprocess rewrites the file.
+    """
+    with open(path, 'rb') as f:
+        return orjson.loads(f.read())
+
+
+@lru_cache(maxsize=128)
+def _load_markdown_cached(path: str, mtime: float) -> str:
+    """
+    Decoded markdown content, cached on (path, mtime) like _load_structure.
+    Search returns full markdown bodies for every hit and the KB set is
+    small, so hot documents skip the read and UTF-8 decode entirely;
+    upload/reprocess write a new filename, so stale entries just age out.
+    """
+    with open(path, 'rb') as f:
+        return f.read().decode('utf-8')
+
+
+def _fetch_kb_metadata(db: Session, kb_ids) -> dict:
+    """
+    One IN-list lookup for KB metadata, stitched client-side. Keeping
+    knowledge_bases out of the vector statement means the ANN scan and
+    rescore touch knowledge_embeddings alone.
+    """
+    ids = set(kb_ids)
+    if not ids:
+        return {}
+    return {
+        kb.id: kb
+        for kb in db.query(models.KnowledgeBase)
+        .filter(models.KnowledgeBase.id.in_(ids))
+        .all()
+    }
+
+
+@lru_cache(maxsize=128)
+def _chunk_markdown_cached(path: str, mtime: float) -> List[str]:
+    """Chunked markdown, cached on (path, mtime) like the raw content."""
+    return chunk_markdown(_load_markdown_cached(path, mtime))
+
+
+def _result_chunk(path: str, section_address: str) -> str:
+    """
+    The chunk of a markdown file a search hit was embedded from. Chunking is
+    deterministic, so re-chunking the stored file and indexing by the
+    "chunk.<i>" address recovers the matched text; if the address no longer
+    maps (file rewritten since embedding), fall back to the whole document.
+    """
+    mtime = os.path.getmtime(path)
+    chunks = _chunk_markdown_cached(path, mtime)
+    _, _, index = section_address.rpartition(".")
+    if index.isdigit() and int(index) < len(chunks):
+        return chunks[int(index)]
+    return _load_markdown_cached(path, mtime)
+
+
+async def _load_result_chunk(path: str, kb_id: int, section_address: str) -> str:
+    """Load a search result's matched chunk, returning "" and logging on failure."""
+    try:
+        return await asyncio.to_thread(_result_chunk, path, section_address)
+    except Exception as e:
+        logger.warning("Internal search: error loading KB %s: %s", kb_id, e)
+        return ""
+
+
+async def _write_markdown_file(path: str, markdown: str) -> None:
+    """
+    Encode once and write in 1 MiB slices: bounded per-write buffers and no
+    single giant write() syscall for multi-MB documents.
+    """
+    data = markdown.encode('utf-8')
+    async with aiofiles.open(path, 'wb') as f:
+        for start in range(0, len(data), 1 << 20):
+            await f.write(data[start:start + (1 << 20)])
+
+
+async def _hash_upload(file: UploadFile) -> str:
+    """
+    SHA-256 of the raw upload bytes via hashlib.file_digest: the file's
+    buffer feeds the hasher directly with no Python-side copy (and no
+    second .encode() of the extracted text). Rewinds the stream around
+    the read so callers can still consume it.
+    """
+    await file.seek(0)
+    digest = await asyncio.to_thread(hashlib.file_digest, file.file, "sha256")
+    await file.seek(0)
+    return digest.hexdigest()
+
+
+async def _format_and_save_markdown(content: str, ext: str, markdown_path: str) -> str:
+    """
+    AI-format .txt/.pdf content to markdown, streaming tokens to
+    markdown_path as they arrive so the disk write overlaps generation.
+    Falls back to writing the original content verbatim on any AI failure
+    (.md files always take the verbatim path). Returns the final markdown.
+    """
+    if ext in (".txt", ".pdf"):
+        logger.info("Formatting %s file to markdown using AI...", ext)
+        try:
+            # Truncate if too long for AI context
+            max_content_length = 30000
+            format_content = content[:max_content_length]
+
+            prompt = _FORMAT_PROMPT_PREFIX + format_content + _FORMAT_PROMPT_SUFFIX
+            pieces = []
+            async with aiofiles.open(markdown_path, 'wb') as f:
+                async for piece in ai_service.stream_text(prompt, complexity="medium"):
+                    pieces.append(piece)
+                    await f.write(piece.encode('utf-8'))
+            markdown_content = "".join(pieces)
+
+            if not markdown_content.strip():
+                raise RuntimeError("AI returned an empty response")
+            logger.info("AI formatted to %d characters", len(markdown_content))
+
+            # If content was truncated, append the rest
+            if len(content) > max_content_length:
+                extra = f"\n\n---\n\n## Additional Content\n\n{content[max_content_length:]}"
+                markdown_content += extra
+                async with aiofiles.open(markdown_path, 'ab') as f:
+                    await f.write(extra.encode('utf-8'))
+            return markdown_content
+        except Exception as e:
+            logger.warning("AI formatting error: %s, using original content", e)
+
+    await _write_markdown_file(markdown_path, content)
+    return content
+
+
+def _chunk_title(chunk: str, kb_name: str) -> str:
+    """First markdown header in the chunk, or the KB name if there is none."""
+    for line in chunk.splitlines():
+        if line.startswith("#"):
+            return line.lstrip("#").strip() or kb_name
+    return kb_name
+
+
 async def generate_and_store_embedding_from_markdown(
-    db: Session, 
-    kb_id: int, 
+    db: Session,
+    kb_id: int,
     kb_name: str,
-    markdown_content: str
+    markdown_content: str,
+    domain: str = "general"
 ) -> int:
     """
-    Generate a single embedding for markdown content and store in database.
-    Returns 1 if successful, 0 if failed.
+    Chunk markdown content, embed all chunks concurrently, and store the
+    embeddings in one bulk insert. Returns the number of embeddings stored.
     """
-    print(f"[KB] Generating embedding for: {kb_name} ({len(markdown_content)} chars)")
-    
-    # Delete existing embeddings for this KB (in case of reprocessing)
-    db.query(models.KnowledgeEmbedding).filter(
-        models.KnowledgeEmbedding.kb_id == kb_id
-    ).delete()
-    
-    # Truncate content if too long for embedding (most models have limits)
-    max_embed_length = 8000  # Conservative limit
-    embed_text = markdown_content[:max_embed_length] if len(markdown_content) > max_embed_length else markdown_content
-    
-    # Generate embedding
-    embedding = await ai_service.generate_embedding(embed_text)
-    
-    if embedding is None:
-        print(f"[KB] Failed to generate embedding")
-        return 0
-    
-    # Store embedding
-    db_embedding = models.KnowledgeEmbedding(
-        kb_id=kb_id,
-        section_address="root",
-        section_title=kb_name,
-        embedding=embedding
+    logger.info("Generating embeddings for: %s (%d chars)", kb_name, len(markdown_content))
+
+    # Delete existing embeddings for this KB (in case of reprocessing).
+    # Core delete: one round trip, no identity-map synchronization work.
+    from sqlalchemy import delete
+    db.execute(
+        delete(models.KnowledgeEmbedding).where(models.KnowledgeEmbedding.kb_id == kb_id)
     )
-    db.add(db_embedding)
+
+    chunks = chunk_markdown(markdown_content)
+
+    # Fire all chunk embeddings at once (bounded so we respect provider rate
+    # limits); each goes through the content-addressed cache first
+    semaphore = asyncio.Semaphore(16)
+
+    async def _embed_chunk(text: str):
+        cache_key = embedding_cache.make_key(ai_service.available_provider, text)
+        cached = await embedding_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        async with semaphore:
+            vec = await ai_service.generate_embedding(text)
+        if vec is not None:
+            await embedding_cache.set(cache_key, vec)
+        return vec
+
+    embeddings = await asyncio.gather(
+        *[_embed_chunk(chunk) for chunk in chunks],
+        return_exceptions=True
+    )
+
+    now = datetime.utcnow()
+    rows = []
+    for i, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
+        if isinstance(embedding, Exception) or embedding is None:
+            logger.warning("Failed to embed chunk %d: %s", i, embedding)
+            continue
+        rows.append({
+            "kb_id": kb_id,
+            # ltree labels are [A-Za-z0-9_], hence the dot separator
+            "section_address": f"chunk.{i}",
+            "section_path": f"chunk.{i}",
+            "section_title": _chunk_title(chunk, kb_name),
+            "domain": domain,
+            "embedding": embedding,
+            "created_at": now,
+        })
+
+    count = _bulk_insert_embeddings(db, rows)
     db.commit()
-    
-    print(f"[KB] Embedding created successfully")
-    return 1
+
+    logger.info("Stored %d/%d chunk embeddings", count, len(chunks))
+    return count
 
 
 async def generate_and_store_embeddings(
@@ -194,11 +449,14 @@ async def generate_and_store_embeddings(
     Legacy function for JSON structure - converts to markdown first.
     """
     kb_name = structure.get("name", "Knowledge Base")
+    kb_domain = structure.get("domain", "general")
     markdown_text = structure_to_markdown(structure)
-    return await generate_and_store_embedding_from_markdown(db, kb_id, kb_name, markdown_text)
+    return await generate_and_store_embedding_from_markdown(db, kb_id, kb_name, markdown_text, domain=kb_domain)
 
 
-router = APIRouter()
+# orjson serialization for responses: KB endpoints return markdown bodies
+# inline that can run to hundreds of KB, where stdlib json.dumps dominates
+router = APIRouter(default_response_class=ORJSONResponse)
 
 # Directory for knowledge base files
 KNOWLEDGE_DIR = "uploads/knowledge"
@@ -273,90 +531,110 @@ CONTENT TO ANALYZE:
 Remember: Return ONLY valid JSON, no markdown code blocks or explanations."""
 
 
+# Split once at import so building a prompt is a two-string concat instead of
+# str.format re-scanning the whole template plus document on every upload.
+# The extraction prompt's {{ }} escapes are collapsed to literal braces first.
+_FORMAT_PROMPT_PREFIX, _, _FORMAT_PROMPT_SUFFIX = FORMAT_TO_MARKDOWN_PROMPT.partition("{content}")
+_EXTRACTION_PROMPT_PREFIX, _, _EXTRACTION_PROMPT_SUFFIX = (
+    KNOWLEDGE_EXTRACTION_PROMPT.replace("{{", "{").replace("}}", "}").partition("{content}")
+)
+
+
 def generate_markdown_from_structure(structure: dict, level: int = 1) -> str:
     """Convert JSON structure to markdown format"""
-    markdown = ""
-    
+    # Collect pieces and join once at the end; += on a string re-copies the
+    # whole document per append, which goes quadratic on large KBs
+    parts = []
+
     if level == 1:
-        markdown += f"# {structure.get('name', 'Knowledge Base')}\n\n"
+        parts.append(f"# {structure.get('name', 'Knowledge Base')}\n\n")
         if structure.get('description'):
-            markdown += f"_{structure['description']}_\n\n"
-        markdown += f"**Domain:** {structure.get('domain', 'general')}\n\n"
-        markdown += "---\n\n"
-    
+            parts.append(f"_{structure['description']}_\n\n")
+        parts.append(f"**Domain:** {structure.get('domain', 'general')}\n\n")
+        parts.append("---\n\n")
+
     for section in structure.get('sections', []):
         # Determine heading level (max h4)
         heading = "#" * min(level + 1, 4)
-        markdown += f"{heading} {section.get('id', '')}. {section.get('title', '')}\n\n"
-        markdown += f"{section.get('content', '')}\n\n"
-        
+        parts.append(f"{heading} {section.get('id', '')}. {section.get('title', '')}\n\n")
+        parts.append(f"{section.get('content', '')}\n\n")
+
         # Recursively process subsections
         if section.get('subsections'):
             for subsection in section['subsections']:
                 sub_heading = "#" * min(level + 2, 5)
-                markdown += f"{sub_heading} {subsection.get('id', '')}. {subsection.get('title', '')}\n\n"
-                markdown += f"{subsection.get('content', '')}\n\n"
-                
+                parts.append(f"{sub_heading} {subsection.get('id', '')}. {subsection.get('title', '')}\n\n")
+                parts.append(f"{subsection.get('content', '')}\n\n")
+
                 # Third level
                 if subsection.get('subsections'):
                     for sub_sub in subsection['subsections']:
-                        markdown += f"**{sub_sub.get('id', '')}. {sub_sub.get('title', '')}**\n\n"
-                        markdown += f"{sub_sub.get('content', '')}\n\n"
-    
-    return markdown
+                        parts.append(f"**{sub_sub.get('id', '')}. {sub_sub.get('title', '')}**\n\n")
+                        parts.append(f"{sub_sub.get('content', '')}\n\n")
+
+    return "".join(parts)
+
+
+def build_section_index(structure: dict) -> dict:
+    """Flatten the section tree into an id -> section dict in one pass."""
+    index = {}
+    stack = list(structure.get("sections", []))
+    while stack:
+        section = stack.pop()
+        section_id = section.get("id")
+        if section_id is not None:
+            index[section_id] = section
+        stack.extend(section.get("subsections", []))
+    return index
 
 
 def get_section_by_address(structure: dict, address: str) -> Optional[dict]:
     """Retrieve a section by its address (e.g., '1.2.3')"""
-    parts = address.split(".")
-    
-    def find_section(sections: list, target_id: str) -> Optional[dict]:
-        for section in sections:
-            if section.get("id") == target_id:
-                return section
-        return None
-    
-    current_sections = structure.get("sections", [])
-    current_section = None
-    
-    for i in range(len(parts)):
-        target_id = ".".join(parts[:i+1])
-        current_section = find_section(current_sections, target_id)
-        
-        if current_section is None:
-            return None
-        
-        if i < len(parts) - 1:
-            current_sections = current_section.get("subsections", [])
-    
-    return current_section
+    # Section ids are full dotted addresses, so a flat index replaces the
+    # per-level linear scans; callers doing many lookups can reuse
+    # build_section_index directly.
+    return build_section_index(structure).get(address)
 
 
 async def extract_content_from_file(file: UploadFile) -> str:
     """Extract text content from uploaded file"""
-    content = await file.read()
+    import codecs
+    from tempfile import SpooledTemporaryFile
+
     ext = os.path.splitext(file.filename)[1].lower()
-    
+
     if ext in [".txt", ".md"]:
-        # Decode text files directly
-        try:
-            return content.decode("utf-8")
-        except UnicodeDecodeError:
-            return content.decode("latin-1")
-    
+        # Decode incrementally per chunk instead of buffering the whole file
+        # and decoding twice; replacement chars stand in for invalid bytes
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        parts = []
+        while chunk := await file.read(1 << 20):
+            parts.append(decoder.decode(chunk))
+        parts.append(decoder.decode(b"", final=True))
+        return "".join(parts)
+
     elif ext == ".pdf":
         # For PDF, use pypdf to extract text
         try:
             import pypdf
-            import io
-            
-            pdf_reader = pypdf.PdfReader(io.BytesIO(content))
-            text_content = []
-            
-            for page in pdf_reader.pages:
-                text_content.append(page.extract_text())
-            
-            return "\n\n".join(text_content)
+
+            # Spool to a temp file so a large PDF isn't held in RAM twice;
+            # anything past 8 MiB spills to disk
+            spool = SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+            while chunk := await file.read(1 << 20):
+                spool.write(chunk)
+            spool.seek(0)
+
+            # Page parsing is CPU-bound; run the whole loop in one worker
+            # thread so the event loop stays free. The pages must be walked
+            # serially: PdfReader resolves objects lazily with seek+read on
+            # the shared stream and is not thread-safe, and pypdf is pure
+            # Python so the GIL would eat any parallel speedup anyway.
+            def _extract_pages() -> str:
+                pdf_reader = pypdf.PdfReader(spool)
+                return "\n\n".join(page.extract_text() for page in pdf_reader.pages)
+
+            return await asyncio.to_thread(_extract_pages)
         except ImportError:
             # If pypdf not installed, send raw content to LLM with instruction
             # This is a fallback - LLM can sometimes parse PDF text
@@ -402,7 +680,7 @@ async def upload_knowledge_base(
     
     # Validate file extension
     ext = os.path.splitext(file.filename)[1].lower()
-    print(f"[KB] Uploading: {file.filename} (ext: {ext})")
+    logger.info("Uploading: %s (ext: %s)", file.filename, ext)
     if ext not in ALLOWED_EXTENSIONS:
         raise HTTPException(
             status_code=400,
@@ -412,9 +690,9 @@ async def upload_knowledge_base(
     # Extract content from file
     try:
         content = await extract_content_from_file(file)
-        print(f"[KB] Extracted {len(content)} characters")
+        logger.debug("Extracted %d characters", len(content))
     except Exception as e:
-        print(f"[KB] Error extracting content: {e}")
+        logger.error("Error extracting content: %s", e)
         raise
     
     if not content.strip():
@@ -423,47 +701,18 @@ async def upload_knowledge_base(
             detail="File appears to be empty or could not be read"
         )
     
-    # For TXT and PDF files, format to markdown using LLM
-    if ext in [".txt", ".pdf"]:
-        print(f"[KB] Formatting {ext} file to markdown using AI...")
-        try:
-            # Truncate if too long for AI context
-            max_content_length = 30000
-            format_content = content[:max_content_length] if len(content) > max_content_length else content
-            
-            prompt = FORMAT_TO_MARKDOWN_PROMPT.format(content=format_content)
-            markdown_content = await ai_service.generate_text(prompt, complexity="medium")
-            
-            # Check for AI errors
-            if markdown_content.startswith("Error:"):
-                print(f"[KB] AI formatting failed: {markdown_content}")
-                # Fallback to original content if AI fails
-                markdown_content = content
-            else:
-                print(f"[KB] AI formatted to {len(markdown_content)} characters")
-                
-                # If content was truncated, append the rest
-                if len(content) > max_content_length:
-                    markdown_content += f"\n\n---\n\n## Additional Content\n\n{content[max_content_length:]}"
-        except Exception as e:
-            print(f"[KB] AI formatting error: {e}, using original content")
-            markdown_content = content
-    else:
-        # MD files are already formatted
-        markdown_content = content
-    
-    # Generate unique filename and save markdown
+    # Generate unique filename; AI formatting (for .txt/.pdf) streams the
+    # markdown straight to disk as tokens arrive
     unique_id = str(uuid.uuid4())
     markdown_filename = f"{unique_id}.md"
     markdown_path = os.path.join(KNOWLEDGE_DIR, markdown_filename)
-    
-    print(f"[KB] Saving markdown to {markdown_path}...")
+
+    logger.debug("Saving markdown to %s...", markdown_path)
     try:
-        async with aiofiles.open(markdown_path, 'w') as f:
-            await f.write(markdown_content)
-        print(f"[KB] File saved successfully")
+        markdown_content = await _format_and_save_markdown(content, ext, markdown_path)
+        logger.debug("File saved successfully")
     except Exception as e:
-        print(f"[KB] Error saving file: {e}")
+        logger.error("Error saving file: %s", e)
         raise HTTPException(status_code=500, detail=f"Failed to save file: {str(e)}")
     
     # Extract description from first meaningful line if not provided
@@ -478,14 +727,16 @@ async def upload_knowledge_base(
                 break
     
     # Create database record
-    print(f"[KB] Creating database record...")
+    logger.debug("Creating database record...")
     db_kb = models.KnowledgeBase(
         name=name,
+        slug=_slugify(name),
         domain=domain,
         description=description,
         json_filename=None,  # No JSON for direct uploads
         markdown_filename=markdown_filename,
         original_filename=file.filename,
+        content_hash=await _hash_upload(file),
         created_by_id=current_user.id,
         updated_by_id=current_user.id
     )
@@ -494,18 +745,18 @@ async def upload_knowledge_base(
         db.add(db_kb)
         db.commit()
         db.refresh(db_kb)
-        print(f"[KB] Database record created with ID: {db_kb.id}")
+        logger.debug("Database record created with ID: %s", db_kb.id)
     except Exception as e:
-        print(f"[KB] Database error: {e}")
+        logger.error("Database error: %s", e)
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
     
     # Generate embedding from formatted markdown content
-    print(f"[KB] Generating embedding...")
+    logger.debug("Generating embedding...")
     try:
-        embeddings_count = await generate_and_store_embedding_from_markdown(db, db_kb.id, name, markdown_content)
-        print(f"[KB] Generated {embeddings_count} embedding(s)")
+        embeddings_count = await generate_and_store_embedding_from_markdown(db, db_kb.id, name, markdown_content, domain=db_kb.domain)
+        logger.info("Generated %d embedding(s)", embeddings_count)
     except Exception as e:
-        print(f"[KB] Warning: Failed to generate embedding: {e}")
+        logger.warning("Failed to generate embedding: %s", e)
         # Don't fail the whole upload if embeddings fail
     
     return {
@@ -529,7 +780,12 @@ async def list_knowledge_bases(
     current_user: user_models.User = Depends(get_current_user)
 ):
     """List all knowledge bases, optionally filtered by domain"""
-    query = db.query(models.KnowledgeBase)
+    # Eager-load the two author relationships in one IN query each, instead
+    # of 2 lazy SELECTs per KB in the loop below
+    query = db.query(models.KnowledgeBase).options(
+        selectinload(models.KnowledgeBase.created_by),
+        selectinload(models.KnowledgeBase.updated_by),
+    )
     
     if domain:
         query = query.filter(models.KnowledgeBase.domain == domain)
@@ -566,7 +822,11 @@ async def get_knowledge_base(
     current_user: user_models.User = Depends(get_current_user)
 ):
     """Get a knowledge base with full content"""
-    kb = db.query(models.KnowledgeBase).filter(models.KnowledgeBase.id == kb_id).first()
+    # Single row, so joined loads fold the author lookups into the SELECT
+    kb = db.query(models.KnowledgeBase).options(
+        joinedload(models.KnowledgeBase.created_by),
+        joinedload(models.KnowledgeBase.updated_by),
+    ).filter(models.KnowledgeBase.id == kb_id).first()
     
     if not kb:
         raise HTTPException(status_code=404, detail="Knowledge base not found")
@@ -577,20 +837,23 @@ async def get_knowledge_base(
     structure = None
     
     try:
-        async with aiofiles.open(markdown_path, 'r') as f:
-            markdown_content = await f.read()
+        # Read bytes and decode once; text mode would decode incrementally in
+        # userland on every read() chunk
+        async with aiofiles.open(markdown_path, 'rb') as f:
+            markdown_content = (await f.read()).decode('utf-8')
     except FileNotFoundError:
         raise HTTPException(
             status_code=404,
             detail="Knowledge base file not found. The file may have been deleted."
         )
-    
+
     # Read JSON structure if it exists (legacy uploads)
     if kb.json_filename:
         json_path = os.path.join(KNOWLEDGE_DIR, kb.json_filename)
         try:
-            async with aiofiles.open(json_path, 'r') as f:
-                structure = json.loads(await f.read())
+            structure = await asyncio.to_thread(
+                _load_structure, json_path, os.path.getmtime(json_path)
+            )
         except FileNotFoundError:
             structure = None
     
@@ -633,8 +896,9 @@ async def get_section(
     json_path = os.path.join(KNOWLEDGE_DIR, kb.json_filename)
     
     try:
-        async with aiofiles.open(json_path, 'r') as f:
-            structure = json.loads(await f.read())
+        structure = await asyncio.to_thread(
+            _load_structure, json_path, os.path.getmtime(json_path)
+        )
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Knowledge base file not found")
     
@@ -686,8 +950,14 @@ async def update_knowledge_base(
     # Update fields
     if update.name is not None:
         kb.name = update.name
+        kb.slug = _slugify(update.name)
     if update.domain is not None:
         kb.domain = update.domain
+        # Keep the denormalized copy on the embeddings in sync, or
+        # domain-filtered search keeps matching this KB's old domain
+        db.query(models.KnowledgeEmbedding).filter(
+            models.KnowledgeEmbedding.kb_id == kb_id
+        ).update({"domain": update.domain}, synchronize_session=False)
     if update.description is not None:
         kb.description = update.description
     
@@ -747,48 +1017,52 @@ async def reprocess_knowledge_base(
     if not content.strip():
         raise HTTPException(status_code=400, detail="File appears to be empty")
     
-    # For TXT and PDF files, format to markdown using LLM
-    if ext in [".txt", ".pdf"]:
-        print(f"[KB] Formatting {ext} file to markdown using AI...")
-        try:
-            max_content_length = 30000
-            format_content = content[:max_content_length] if len(content) > max_content_length else content
-            
-            prompt = FORMAT_TO_MARKDOWN_PROMPT.format(content=format_content)
-            markdown_content = await ai_service.generate_text(prompt, complexity="medium")
-            
-            if markdown_content.startswith("Error:"):
-                markdown_content = content
-            elif len(content) > max_content_length:
-                markdown_content += f"\n\n---\n\n## Additional Content\n\n{content[max_content_length:]}"
-        except Exception as e:
-            print(f"[KB] AI formatting error: {e}, using original content")
-            markdown_content = content
-    else:
-        markdown_content = content
+    # Byte-identical re-upload (common when only metadata changes): skip the
+    # LLM reformatting and re-embedding entirely, just bump the version
+    new_hash = await _hash_upload(file)
+    if kb.content_hash is not None and new_hash == kb.content_hash:
+        logger.info("Content unchanged for KB %s, skipping reprocess", kb.id)
+        kb.version += 1
+        kb.updated_by_id = current_user.id
+        kb.updated_at = datetime.utcnow()
+        db.commit()
+        return {
+            "id": kb.id,
+            "name": kb.name,
+            "domain": kb.domain,
+            "description": kb.description,
+            "original_filename": kb.original_filename,
+            "version": kb.version,
+            "created_at": kb.created_at,
+            "updated_at": kb.updated_at,
+            "created_by_name": kb.created_by.full_name if kb.created_by else None,
+            "updated_by_name": current_user.full_name
+        }
     
-    # Delete old files
+    # Delete old files; try/except saves the exists() stat and keeps the
+    # blocking unlink off the event loop
     if kb.json_filename:
-        old_json_path = os.path.join(KNOWLEDGE_DIR, kb.json_filename)
-        if os.path.exists(old_json_path):
-            os.remove(old_json_path)
-    
-    old_markdown_path = os.path.join(KNOWLEDGE_DIR, kb.markdown_filename)
-    if os.path.exists(old_markdown_path):
-        os.remove(old_markdown_path)
-    
-    # Generate new markdown file
+        try:
+            await aiofiles.os.remove(os.path.join(KNOWLEDGE_DIR, kb.json_filename))
+        except FileNotFoundError:
+            pass
+    try:
+        await aiofiles.os.remove(os.path.join(KNOWLEDGE_DIR, kb.markdown_filename))
+    except FileNotFoundError:
+        pass
+
+    # Generate new markdown file; AI formatting streams straight to it
     unique_id = str(uuid.uuid4())
     markdown_filename = f"{unique_id}.md"
     markdown_path = os.path.join(KNOWLEDGE_DIR, markdown_filename)
-    
-    async with aiofiles.open(markdown_path, 'w') as f:
-        await f.write(markdown_content)
-    
+
+    markdown_content = await _format_and_save_markdown(content, ext, markdown_path)
+
     # Update database record
     kb.json_filename = None  # New uploads don't use JSON
     kb.markdown_filename = markdown_filename
     kb.original_filename = file.filename
+    kb.content_hash = new_hash
     kb.version += 1
     kb.updated_by_id = current_user.id
     kb.updated_at = datetime.utcnow()
@@ -798,9 +1072,9 @@ async def reprocess_knowledge_base(
     
     # Regenerate embedding
     try:
-        await generate_and_store_embedding_from_markdown(db, kb.id, kb.name, markdown_content)
+        await generate_and_store_embedding_from_markdown(db, kb.id, kb.name, markdown_content, domain=kb.domain)
     except Exception as e:
-        print(f"[KB] Warning: Failed to regenerate embedding: {e}")
+        logger.warning("Failed to regenerate embedding: %s", e)
     
     return {
         "id": kb.id,
@@ -834,15 +1108,16 @@ async def delete_knowledge_base(
     if not kb:
         raise HTTPException(status_code=404, detail="Knowledge base not found")
     
-    # Delete files
+    # Delete files without blocking the event loop
     if kb.json_filename:
-        json_path = os.path.join(KNOWLEDGE_DIR, kb.json_filename)
-        if os.path.exists(json_path):
-            os.remove(json_path)
-    
-    markdown_path = os.path.join(KNOWLEDGE_DIR, kb.markdown_filename)
-    if os.path.exists(markdown_path):
-        os.remove(markdown_path)
+        try:
+            await aiofiles.os.remove(os.path.join(KNOWLEDGE_DIR, kb.json_filename))
+        except FileNotFoundError:
+            pass
+    try:
+        await aiofiles.os.remove(os.path.join(KNOWLEDGE_DIR, kb.markdown_filename))
+    except FileNotFoundError:
+        pass
     
     # Delete database record
     db.delete(kb)
@@ -858,19 +1133,27 @@ async def download_markdown(
     current_user: user_models.User = Depends(get_current_user)
 ):
     """Download the generated markdown file"""
-    kb = db.query(models.KnowledgeBase).filter(models.KnowledgeBase.id == kb_id).first()
+    # Only the filename and display name are needed; skip hydrating the rest
+    kb = db.query(models.KnowledgeBase).options(
+        load_only(models.KnowledgeBase.name, models.KnowledgeBase.slug, models.KnowledgeBase.markdown_filename)
+    ).filter(models.KnowledgeBase.id == kb_id).first()
     
     if not kb:
         raise HTTPException(status_code=404, detail="Knowledge base not found")
     
     markdown_path = os.path.join(KNOWLEDGE_DIR, kb.markdown_filename)
-    
-    if not os.path.exists(markdown_path):
+
+    # Reuse the existence-check stat so FileResponse doesn't stat again
+    # before streaming the file via sendfile
+    try:
+        stat_result = os.stat(markdown_path)
+    except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Markdown file not found")
-    
+
     return FileResponse(
         markdown_path,
-        filename=f"{kb.name.replace(' ', '_')}.md",
+        stat_result=stat_result,
+        filename=f"{kb.slug or _slugify(kb.name)}.md",
         media_type="text/markdown"
     )
 
@@ -882,7 +1165,9 @@ async def download_json(
     current_user: user_models.User = Depends(get_current_user)
 ):
     """Download the structured JSON file (only available for legacy structured KBs)"""
-    kb = db.query(models.KnowledgeBase).filter(models.KnowledgeBase.id == kb_id).first()
+    kb = db.query(models.KnowledgeBase).options(
+        load_only(models.KnowledgeBase.name, models.KnowledgeBase.slug, models.KnowledgeBase.json_filename)
+    ).filter(models.KnowledgeBase.id == kb_id).first()
     
     if not kb:
         raise HTTPException(status_code=404, detail="Knowledge base not found")
@@ -894,13 +1179,16 @@ async def download_json(
         )
     
     json_path = os.path.join(KNOWLEDGE_DIR, kb.json_filename)
-    
-    if not os.path.exists(json_path):
+
+    try:
+        stat_result = os.stat(json_path)
+    except FileNotFoundError:
         raise HTTPException(status_code=404, detail="JSON file not found")
-    
+
     return FileResponse(
         json_path,
-        filename=f"{kb.name.replace(' ', '_')}.json",
+        stat_result=stat_result,
+        filename=f"{kb.slug or _slugify(kb.name)}.json",
         media_type="application/json"
     )
 
@@ -909,6 +1197,176 @@ async def download_json(
 # Vector Search Utilities (for internal use)
 # ============================================================================
 
+# The four vector-search statements, constructed once at import so
+# SQLAlchemy's compiled-statement cache keys on the same objects instead of
+# re-lexing the SQL string on every request. (Server-side prepared
+# statements via prepare_threshold would additionally need psycopg3.)
+# The rescore collapses to the best-scoring chunk per KB via DISTINCT ON,
+# so a long document can't fill the result list with its own chunks.
+_INTERNAL_SEARCH_SQL_DOMAIN = text("""
+    SELECT best.kb_id, best.section_address, best.section_title, best.distance
+    FROM (
+        SELECT DISTINCT ON (ke.kb_id)
+            ke.kb_id,
+            ke.section_address,
+            ke.section_title,
+            ke.embedding <#> :embedding as distance
+        FROM knowledge_embeddings ke
+        JOIN (
+            SELECT id
+            FROM knowledge_embeddings
+            WHERE domain = :domain
+            ORDER BY binary_quantize(embedding)::bit(1024)
+                <~> binary_quantize((:embedding)::halfvec(1024))
+            LIMIT :prefilter_limit
+        ) cand ON cand.id = ke.id
+        ORDER BY ke.kb_id, ke.embedding <#> :embedding
+    ) best
+    ORDER BY best.distance
+    LIMIT :limit
+""")
+
+_INTERNAL_SEARCH_SQL = text("""
+    SELECT best.kb_id, best.section_address, best.section_title, best.distance
+    FROM (
+        SELECT DISTINCT ON (ke.kb_id)
+            ke.kb_id,
+            ke.section_address,
+            ke.section_title,
+            ke.embedding <#> :embedding as distance
+        FROM knowledge_embeddings ke
+        JOIN (
+            SELECT id
+            FROM knowledge_embeddings
+            ORDER BY binary_quantize(embedding)::bit(1024)
+                <~> binary_quantize((:embedding)::halfvec(1024))
+            LIMIT :prefilter_limit
+        ) cand ON cand.id = ke.id
+        ORDER BY ke.kb_id, ke.embedding <#> :embedding
+    ) best
+    ORDER BY best.distance
+    LIMIT :limit
+""")
+
+_SEARCH_SQL_DOMAIN = text("""
+    SELECT best.id, best.kb_id, best.section_address, best.section_title, best.distance
+    FROM (
+        SELECT DISTINCT ON (ke.kb_id)
+            ke.id,
+            ke.kb_id,
+            ke.section_address,
+            ke.section_title,
+            ke.embedding <#> :embedding as distance
+        FROM knowledge_embeddings ke
+        JOIN (
+            SELECT id
+            FROM knowledge_embeddings
+            WHERE domain = :domain
+            ORDER BY binary_quantize(embedding)::bit(1024)
+                <~> binary_quantize((:embedding)::halfvec(1024))
+            LIMIT :prefilter_limit
+        ) cand ON cand.id = ke.id
+        ORDER BY ke.kb_id, ke.embedding <#> :embedding
+    ) best
+    ORDER BY best.distance
+    LIMIT :limit
+""")
+
+_SEARCH_SQL = text("""
+    SELECT best.id, best.kb_id, best.section_address, best.section_title, best.distance
+    FROM (
+        SELECT DISTINCT ON (ke.kb_id)
+            ke.id,
+            ke.kb_id,
+            ke.section_address,
+            ke.section_title,
+            ke.embedding <#> :embedding as distance
+        FROM knowledge_embeddings ke
+        JOIN (
+            SELECT id
+            FROM knowledge_embeddings
+            ORDER BY binary_quantize(embedding)::bit(1024)
+                <~> binary_quantize((:embedding)::halfvec(1024))
+            LIMIT :prefilter_limit
+        ) cand ON cand.id = ke.id
+        ORDER BY ke.kb_id, ke.embedding <#> :embedding
+    ) best
+    ORDER BY best.distance
+    LIMIT :limit
+""")
+
+
+def _set_hnsw_ef_search(db: Session, limit: Optional[int] = None):
+    """
+    Tune the HNSW traversal for the current transaction before running an ANN
+    query. set_config(..., true) is the parameterizable equivalent of
+    SET LOCAL, so concurrent sessions are unaffected.
+
+    ef_search scales with the requested limit: the hamming prefilter pulls
+    max(limit * 10, 100) candidates, and the graph walk can only return
+    ef_search rows, so large searches get a bigger budget while small ones
+    stay at the configured default.
+    """
+    from sqlalchemy.exc import DBAPIError
+    ef = settings.HNSW_EF_SEARCH
+    if limit is not None:
+        ef = max(ef, limit * 10)
+    db.execute(
+        text("SELECT set_config('hnsw.ef_search', :ef, true)"),
+        {"ef": str(ef)}
+    )
+    # Iterative scan bounds filtered searches (pgvector >= 0.8). Older
+    # versions reject the GUC, so swallow the error and continue with the
+    # plain scan behavior.
+    try:
+        db.execute(
+            text("SELECT set_config('hnsw.iterative_scan', :mode, true), "
+                 "set_config('hnsw.max_scan_tuples', :cap, true)"),
+            {
+                "mode": settings.HNSW_ITERATIVE_SCAN,
+                "cap": str(settings.HNSW_MAX_SCAN_TUPLES),
+            }
+        )
+    except DBAPIError:
+        db.rollback()
+        db.execute(
+            text("SELECT set_config('hnsw.ef_search', :ef, true)"),
+            {"ef": str(ef)}
+        )
+
+
+# Query-embedding cache: users iterate on near-identical contexts, so a hit
+# skips the 50-200ms embedding API call entirely. Keyed by provider so
+# switching API keys invalidates. Values are the pgvector text literal:
+# psycopg2 speaks the text protocol, so serializing the ~1024 floats once
+# at cache-fill time beats re-running str(list) on every search.
+_query_embedding_cache: TTLCache = TTLCache(maxsize=10_000, ttl=3600)
+_query_embedding_cache_lock = threading.Lock()
+
+
+async def _embed_query_cached(query: str) -> Optional[str]:
+    """
+    Embed a search query and return it as a pgvector text literal,
+    reusing a recent embedding of the same text.
+    """
+    key = (
+        ai_service.available_provider,
+        hashlib.sha256(query.strip().lower().encode()).hexdigest(),
+    )
+    with _query_embedding_cache_lock:
+        cached = _query_embedding_cache.get(key)
+    if cached is not None:
+        return cached
+
+    embedding = await ai_service.generate_embedding(query)
+    if embedding is None:
+        return None
+    literal = "[" + ",".join(map(str, embedding)) + "]"
+    with _query_embedding_cache_lock:
+        _query_embedding_cache[key] = literal
+    return literal
+
+
 async def search_knowledge_base_internal(
     query: str,
     db: Session,
@@ -928,96 +1386,90 @@ async def search_knowledge_base_internal(
         domain: Optional domain filter
     
     Returns:
-        List of matching KB entries with content and scores
+        List of matching KB entries (one per KB, carrying its best-matching
+        chunk as content) with similarity scores
     """
-    from sqlalchemy import text
-    
+    # Empty queries would cost a full embedding round trip for a
+    # meaningless vector; oversized ones just get clipped to the
+    # provider's practical input budget
+    if not query or not query.strip():
+        return []
+    query = query[:8000]
+
     # Generate embedding for the query
-    print(f"[KB Internal Search] Searching for: {query[:100]}...")
-    query_embedding = await ai_service.generate_embedding(query)
+    logger.debug("Internal search for: %.100s...", query)
+    query_embedding = await _embed_query_cached(query)
     
     if query_embedding is None:
-        print("[KB Internal Search] Failed to generate embedding")
+        logger.warning("Internal search: failed to generate embedding")
         return []
-    
-    # Search with vector similarity
+
+    # Tune the ANN traversal for this transaction, then search by similarity
+    _set_hnsw_ef_search(db, limit)
     if domain:
         results = db.execute(
-            text("""
-                SELECT 
-                    ke.kb_id,
-                    ke.section_title,
-                    kb.name as kb_name,
-                    kb.domain,
-                    kb.description,
-                    kb.markdown_filename,
-                    ke.embedding <=> :embedding as distance
-                FROM knowledge_embeddings ke
-                JOIN knowledge_bases kb ON ke.kb_id = kb.id
-                WHERE kb.domain = :domain
-                ORDER BY ke.embedding <=> :embedding
-                LIMIT :limit
-            """),
-            {"embedding": str(query_embedding), "domain": domain, "limit": limit}
+            _INTERNAL_SEARCH_SQL_DOMAIN,
+            {"embedding": query_embedding, "domain": domain, "limit": limit,
+             "prefilter_limit": max(limit * 10, 100)}
         ).fetchall()
     else:
         results = db.execute(
-            text("""
-                SELECT 
-                    ke.kb_id,
-                    ke.section_title,
-                    kb.name as kb_name,
-                    kb.domain,
-                    kb.description,
-                    kb.markdown_filename,
-                    ke.embedding <=> :embedding as distance
-                FROM knowledge_embeddings ke
-                JOIN knowledge_bases kb ON ke.kb_id = kb.id
-                ORDER BY ke.embedding <=> :embedding
-                LIMIT :limit
-            """),
-            {"embedding": str(query_embedding), "limit": limit}
+            _INTERNAL_SEARCH_SQL,
+            {"embedding": query_embedding, "limit": limit,
+             "prefilter_limit": max(limit * 10, 100)}
         ).fetchall()
     
-    print(f"[KB Internal Search] Found {len(results)} raw results")
-    
-    # Log all similarity scores for debugging
-    if results:
-        print(f"[KB Internal Search] Similarity scores (threshold={min_score}):")
-        for row in results:
-            sim = max(0, 1 - float(row.distance))
-            status = "✓" if sim >= min_score else "✗"
-            print(f"  {status} {row.kb_name} ({row.domain}): {sim:.4f}")
-    
-    # Process results and filter by min_score
-    search_results = []
-    for row in results:
-        similarity = max(0, 1 - float(row.distance))
-        
-        # Skip if below minimum score threshold
-        if similarity < min_score:
-            continue
-        
-        # Load markdown content directly
-        markdown_path = os.path.join(KNOWLEDGE_DIR, row.markdown_filename)
-        markdown_content = ""
-        
-        try:
-            async with aiofiles.open(markdown_path, 'r') as f:
-                markdown_content = await f.read()
-        except Exception as e:
-            print(f"[KB Internal Search] Error loading KB {row.kb_id}: {e}")
-        
-        search_results.append({
+    logger.debug("Internal search found %d raw results", len(results))
+
+    # Metadata comes from one IN-list lookup after the vector scan
+    kbs = _fetch_kb_metadata(db, (row.kb_id for row in results))
+
+    # Similarity is the (clamped) inner product; one vectorized pass over
+    # the distance column instead of per-row Python float math
+    dists = np.fromiter((row.distance for row in results), dtype=np.float32, count=len(results))
+    sims = np.maximum(0.0, -dists)
+
+    # Log all similarity scores for debugging; guarded so the per-row
+    # formatting is skipped entirely at production log levels
+    if results and logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Internal search similarity scores (threshold=%s):", min_score)
+        for row, sim in zip(results, sims):
+            marker = "✓" if sim >= min_score else "✗"
+            kb = kbs.get(row.kb_id)
+            logger.debug("  %s %s (%s): %.4f", marker, kb.name if kb else row.kb_id,
+                         kb.domain if kb else "?", sim)
+
+    # Filter by min_score, then load the matched chunks concurrently so
+    # cold-cache disk latencies overlap instead of stacking. Returning the
+    # chunk rather than the whole document keeps prompts built from these
+    # results at chunk granularity.
+    filtered = [
+        (results[i], float(sims[i]))
+        for i in np.nonzero(sims >= min_score)[0]
+        if results[i].kb_id in kbs
+    ]
+    contents = await asyncio.gather(*(
+        _load_result_chunk(
+            os.path.join(KNOWLEDGE_DIR, kbs[row.kb_id].markdown_filename),
+            row.kb_id,
+            row.section_address,
+        )
+        for row, _ in filtered
+    ))
+
+    search_results = [
+        {
             "kb_id": row.kb_id,
-            "kb_name": row.kb_name,
-            "domain": row.domain,
-            "description": row.description or "",
+            "kb_name": kbs[row.kb_id].name,
+            "domain": kbs[row.kb_id].domain,
+            "description": kbs[row.kb_id].description or "",
             "content": markdown_content,
             "similarity_score": round(similarity, 4)
-        })
+        }
+        for (row, similarity), markdown_content in zip(filtered, contents)
+    ]
     
-    print(f"[KB Internal Search] {len(search_results)} results above {min_score} threshold")
+    logger.debug("Internal search: %d results above %s threshold", len(search_results), min_score)
     return search_results
 
 
@@ -1042,9 +1494,15 @@ async def search_knowledge_base(
         limit: Maximum number of results (default 5)
         domain: Optional domain filter (backend, frontend, etc.)
     """
+    # Reject degenerate queries before spending an embedding API call
+    if not query.strip():
+        raise HTTPException(status_code=400, detail="Search query cannot be empty")
+    if len(query) > 8000:
+        raise HTTPException(status_code=400, detail="Search query is too long (max 8000 characters)")
+
     # Generate embedding for the query
-    print(f"[KB Search] Searching for: {query}")
-    query_embedding = await ai_service.generate_embedding(query)
+    logger.debug("Search for: %s", query)
+    query_embedding = await _embed_query_cached(query)
     
     if query_embedding is None:
         raise HTTPException(
@@ -1052,65 +1510,39 @@ async def search_knowledge_base(
             detail="Failed to generate embedding for search query"
         )
     
-    # Build the query with vector similarity
-    from sqlalchemy import text
-    from pgvector.sqlalchemy import Vector
-    
-    # Use cosine distance for similarity search
-    # Lower distance = more similar
+    _set_hnsw_ef_search(db, limit)
     if domain:
         results = db.execute(
-            text("""
-                SELECT 
-                    ke.id,
-                    ke.kb_id,
-                    ke.section_address,
-                    ke.section_title,
-                    kb.name as kb_name,
-                    kb.domain,
-                    kb.description,
-                    ke.embedding <=> :embedding as distance
-                FROM knowledge_embeddings ke
-                JOIN knowledge_bases kb ON ke.kb_id = kb.id
-                WHERE kb.domain = :domain
-                ORDER BY ke.embedding <=> :embedding
-                LIMIT :limit
-            """),
-            {"embedding": str(query_embedding), "domain": domain, "limit": limit}
+            _SEARCH_SQL_DOMAIN,
+            {"embedding": query_embedding, "domain": domain, "limit": limit,
+             "prefilter_limit": max(limit * 10, 100)}
         ).fetchall()
     else:
         results = db.execute(
-            text("""
-                SELECT 
-                    ke.id,
-                    ke.kb_id,
-                    ke.section_address,
-                    ke.section_title,
-                    kb.name as kb_name,
-                    kb.domain,
-                    kb.description,
-                    ke.embedding <=> :embedding as distance
-                FROM knowledge_embeddings ke
-                JOIN knowledge_bases kb ON ke.kb_id = kb.id
-                ORDER BY ke.embedding <=> :embedding
-                LIMIT :limit
-            """),
-            {"embedding": str(query_embedding), "limit": limit}
+            _SEARCH_SQL,
+            {"embedding": query_embedding, "limit": limit,
+             "prefilter_limit": max(limit * 10, 100)}
         ).fetchall()
     
-    print(f"[KB Search] Found {len(results)} results")
-    
+    logger.debug("Search found %d results", len(results))
+
+    # Metadata comes from one IN-list lookup after the vector scan
+    kbs = _fetch_kb_metadata(db, (row.kb_id for row in results))
+
     # Build search results from database records
     search_results = []
     for row in results:
-        # Convert distance to similarity score (1 - distance for cosine)
-        similarity = max(0, 1 - float(row.distance))
-        
+        kb = kbs.get(row.kb_id)
+        if kb is None:
+            continue
+        # Similarity is the clamped inner product; <#> returns its negative
+        similarity = max(0, -float(row.distance))
+
         search_results.append({
             "kb_id": row.kb_id,
-            "kb_name": row.kb_name,
-            "domain": row.domain,
-            "description": row.description or "",
+            "kb_name": kb.name,
+            "domain": kb.domain,
+            "description": kb.description or "",
             "similarity_score": round(similarity, 4)
         })
     
@@ -1128,10 +1560,14 @@ async def get_embeddings_count(
     current_user: user_models.User = Depends(get_current_user)
 ):
     """Get the number of embeddings for a knowledge base"""
-    count = db.query(models.KnowledgeEmbedding).filter(
-        models.KnowledgeEmbedding.kb_id == kb_id
-    ).count()
-    
+    # Core select emits a plain SELECT count(*) rather than the ORM's
+    # subquery-wrapped count, and skips row hydration entirely
+    count = db.execute(
+        select(func.count())
+        .select_from(models.KnowledgeEmbedding)
+        .where(models.KnowledgeEmbedding.kb_id == kb_id)
+    ).scalar()
+
     return {"kb_id": kb_id, "embeddings_count": count}
 
 
@@ -1157,13 +1593,13 @@ async def regenerate_embeddings(
     markdown_path = os.path.join(KNOWLEDGE_DIR, kb.markdown_filename)
     
     try:
-        async with aiofiles.open(markdown_path, 'r') as f:
-            markdown_content = await f.read()
+        async with aiofiles.open(markdown_path, 'rb') as f:
+            markdown_content = (await f.read()).decode('utf-8')
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Knowledge base markdown file not found")
     
     # Regenerate embeddings from markdown content
-    embeddings_count = await generate_and_store_embedding_from_markdown(db, kb_id, kb.name, markdown_content)
+    embeddings_count = await generate_and_store_embedding_from_markdown(db, kb_id, kb.name, markdown_content, domain=kb.domain)
     
     return {
         "kb_id": kb_id,
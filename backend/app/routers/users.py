@@ -32,25 +32,38 @@ def create_user(user: schemas.UserCreate, db: Session = Depends(database.get_db)
 @router.get("/", response_model=List[schemas.User])
 def list_users(
     role: Optional[str] = None,
+    cursor: int = 0,
+    limit: int = 100,
     db: Session = Depends(database.get_db),
     current_user: models.User = Depends(get_current_user)
 ):
-    """List all users, optionally filtered by role"""
-    query = db.query(models.User).filter(models.User.is_active == True)
+    """List active users, optionally filtered by role.
+
+    Keyset-paginated: pass the last id of the previous page as ``cursor``.
+    Bounds the rows fetched and Pydantic-serialized per request; the
+    id > cursor filter walks the partial active-user indexes.
+    """
+    query = db.query(models.User).filter(
+        models.User.is_active == True,
+        models.User.id > cursor
+    )
     if role:
         query = query.filter(models.User.role == role)
-    return query.all()
+    return query.order_by(models.User.id).limit(min(limit, 500)).all()
 
 @router.get("/developers", response_model=List[schemas.User])
 def list_developers(
+    cursor: int = 0,
+    limit: int = 100,
     db: Session = Depends(database.get_db),
     current_user: models.User = Depends(get_current_user)
 ):
     """List all developers (for assignment dropdown)"""
     return db.query(models.User).filter(
         models.User.is_active == True,
-        models.User.role.in_([UserRole.DEVELOPER.value, UserRole.PM.value, UserRole.ADMIN.value])
-    ).all()
+        models.User.role.in_([UserRole.DEVELOPER.value, UserRole.PM.value, UserRole.ADMIN.value]),
+        models.User.id > cursor
+    ).order_by(models.User.id).limit(min(limit, 500)).all()
 
 @router.get("/me", response_model=schemas.User)
 def read_users_me(current_user: models.User = Depends(get_current_user)):
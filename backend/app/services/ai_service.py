@@ -1,9 +1,26 @@
+import asyncio
+import numpy as np
 import openai
 import google.generativeai as genai
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional
 from ..core.config import settings
 
 
+def _l2_normalize(vec) -> np.ndarray:
+    """
+    Normalize an embedding to unit length as a float32 ndarray. Stored and
+    query vectors are all unit-norm, which lets the DB rank with the cheaper
+    inner-product operator (<#>) while returning cosine-identical ordering.
+    The ndarray holds the 1024 dims as 4 KB of packed fp32 instead of a
+    list of boxed Python floats, and the norm runs as one vector op.
+    """
+    arr = np.asarray(vec, dtype=np.float32)
+    norm = np.linalg.norm(arr)
+    if norm == 0:
+        return arr
+    return arr / norm
+
+
 class AIService:
     """
     AI Service that auto-detects which provider to use based on available API keys.
@@ -97,10 +114,47 @@ class AIService:
         
         return "Error: Invalid AI Provider configuration."
 
-    async def generate_embedding(self, text: str) -> Optional[List[float]]:
+    async def stream_text(self, prompt: str, complexity: str = "low") -> AsyncIterator[str]:
+        """
+        Stream generated text, yielding deltas as the provider produces them.
+        Unlike generate_text, errors raise instead of returning an error
+        string - a partially-yielded stream can't be replaced with a message.
+        """
+        if self.available_provider == "none":
+            raise RuntimeError("No AI API key configured. Please set OPENAI_API_KEY or GENAI_API_KEY in your .env file.")
+
+        model = self._get_model(complexity)
+
+        if self.available_provider == "openai":
+            client = openai.AsyncOpenAI(api_key=self.openai_api_key)
+            stream = await client.chat.completions.create(
+                model=model,
+                messages=[{"role": "user", "content": prompt}],
+                stream=True
+            )
+            async for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    yield delta
+
+        elif self.available_provider == "genai":
+            model_instance = genai.GenerativeModel(model)
+            # The GenAI SDK streams through a sync iterator; advance it in a
+            # worker thread so waiting on tokens doesn't block the event loop
+            response = await asyncio.to_thread(model_instance.generate_content, prompt, stream=True)
+            iterator = iter(response)
+            sentinel = object()
+            while True:
+                chunk = await asyncio.to_thread(next, iterator, sentinel)
+                if chunk is sentinel:
+                    break
+                if chunk.text:
+                    yield chunk.text
+
+    async def generate_embedding(self, text: str) -> Optional[np.ndarray]:
         """
         Generate embedding vector for text using auto-detected provider.
-        Returns a list of floats (the embedding vector) or None on error.
+        Returns a float32 ndarray (the embedding vector) or None on error.
         
         Models and dimensions are configured via .env:
         - OPENAI_EMBEDDING_MODEL (default: text-embedding-3-large)
@@ -123,7 +177,7 @@ class AIService:
                     dimensions=dimensions
                 )
                 print(f"[AI Service] OpenAI embedding: model={model}, dims={dimensions}")
-                return response.data[0].embedding
+                return _l2_normalize(response.data[0].embedding)
             except Exception as e:
                 print(f"[AI Service] OpenAI Embedding Error: {str(e)}")
                 return None
@@ -137,22 +191,56 @@ class AIService:
                     output_dimensionality=dimensions
                 )
                 print(f"[AI Service] GenAI embedding: model={model}, dims={dimensions}")
-                return result['embedding']
+                return _l2_normalize(result['embedding'])
             except Exception as e:
                 print(f"[AI Service] GenAI Embedding Error: {str(e)}")
                 return None
         
         return None
 
-    async def generate_embeddings_batch(self, texts: List[str]) -> List[Optional[List[float]]]:
+    # Both providers accept ~100 inputs per embeddings request
+    EMBEDDING_BATCH_SIZE = 100
+
+    async def generate_embeddings_batch(self, texts: List[str]) -> List[Optional[np.ndarray]]:
         """
-        Generate embeddings for multiple texts.
-        Returns list of embedding vectors (or None for failed ones).
+        Generate embeddings for multiple texts in one API call per batch of
+        EMBEDDING_BATCH_SIZE instead of one round trip per text.
+        Returns list of embedding vectors (or None for failed ones); a failed
+        batch falls back to embedding its items individually.
         """
-        results = []
-        for text in texts:
-            embedding = await self.generate_embedding(text)
-            results.append(embedding)
+        if not texts:
+            return []
+        if self.available_provider == "none":
+            print("[AI Service] Error: No AI API key configured for embeddings")
+            return [None] * len(texts)
+
+        dimensions = settings.EMBEDDING_DIMENSIONS
+        results: List[Optional[np.ndarray]] = []
+
+        for start in range(0, len(texts), self.EMBEDDING_BATCH_SIZE):
+            batch = texts[start:start + self.EMBEDDING_BATCH_SIZE]
+            try:
+                if self.available_provider == "openai":
+                    client = openai.AsyncOpenAI(api_key=self.openai_api_key)
+                    response = await client.embeddings.create(
+                        model=settings.OPENAI_EMBEDDING_MODEL,
+                        input=batch,
+                        dimensions=dimensions
+                    )
+                    results.extend(_l2_normalize(item.embedding) for item in response.data)
+                else:
+                    result = await asyncio.to_thread(
+                        genai.embed_content,
+                        model=settings.GENAI_EMBEDDING_MODEL,
+                        content=batch,
+                        output_dimensionality=dimensions
+                    )
+                    results.extend(_l2_normalize(vec) for vec in result['embedding'])
+            except Exception as e:
+                print(f"[AI Service] Batch embedding error: {str(e)}; retrying items individually")
+                for text in batch:
+                    results.append(await self.generate_embedding(text))
+
         return results
     
     def get_embedding_dimensions(self) -> int:
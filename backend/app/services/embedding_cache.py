@@ -0,0 +1,38 @@
+"""
+Embedding Cache
+
+Content-addressed cache for embedding vectors, keyed by a truncated SHA-256
+of the embedded text plus the active provider. Uploading or reprocessing the
+same document skips the embedding API call entirely.
+
+The deployment has no Redis, so this is an in-process TTL cache; the
+interface is async so a shared backend can be swapped in without touching
+callers.
+"""
+import hashlib
+import threading
+from typing import Optional
+
+import numpy as np
+from cachetools import TTLCache
+
+from ..core.config import settings
+
+# Values are float32 ndarrays (4 KB per 1024-dim vector); callers treat
+# them as read-only.
+_cache: TTLCache = TTLCache(maxsize=2048, ttl=settings.EMBEDDING_CACHE_TTL)
+_lock = threading.Lock()
+
+
+def make_key(provider: str, text: str) -> str:
+    return f"emb:{provider}:{hashlib.sha256(text.encode()).hexdigest()[:32]}"
+
+
+async def get(key: str) -> Optional[np.ndarray]:
+    with _lock:
+        return _cache.get(key)
+
+
+async def set(key: str, vec) -> None:
+    with _lock:
+        _cache[key] = np.asarray(vec, dtype=np.float32)